@@ -0,0 +1,11 @@
+"""
+conftest.py
+Shared pytest setup for the test scripts in the project root and tests/
+"""
+
+import os
+import sys
+
+# Make project modules (monitoring, security_checks, ...) importable once
+# for every collected test file
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
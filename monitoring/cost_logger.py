@@ -330,6 +330,10 @@ def log_cost(pr_url: str, operation: str, model: str,
     # 🛡️ BUDGET GUARD INTEGRATION - Real-time budget monitoring (FIXED)
     check_budget_integration_safe(pr_url, operation, cost, latency_ms, total_tokens)
 
+    # New spend invalidates the cached budget summary
+    global _STATUS_CACHE
+    _STATUS_CACHE = (0.0, None)
+
     return cost
 
 def log_cost_with_error(pr_url: str, operation: str, error: Exception, 
@@ -564,11 +568,30 @@ def generate_cost_summary() -> str:
     
     return summary
 
+# Cached (monotonic timestamp, summary) pair; log_cost resets it on write
+_STATUS_CACHE = (0.0, None)
+_STATUS_CACHE_TTL = 1.0
+
 def get_budget_status_summary() -> str:
     """
     Get a quick budget status summary for console output
     Integration function for main workflow
+
+    Repeated calls within _STATUS_CACHE_TTL seconds reuse the last summary
+    instead of re-aggregating the budget state
     """
+    global _STATUS_CACHE
+    now = time.monotonic()
+    cached_at, summary = _STATUS_CACHE
+    if summary is not None and now - cached_at < _STATUS_CACHE_TTL:
+        return summary
+
+    summary = _compute_budget_status_summary()
+    _STATUS_CACHE = (now, summary)
+    return summary
+
+def _compute_budget_status_summary() -> str:
+    """Build the budget status summary from the current guard state"""
     if not BUDGET_GUARD_ENABLED:
         return "🛡️ Budget monitoring: Disabled"
     
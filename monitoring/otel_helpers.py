@@ -10,6 +10,7 @@ import base64
 from typing import Dict, Any, Optional, Union
 from contextlib import nullcontext
 from dataclasses import dataclass
+from functools import lru_cache
 from datetime import datetime, timezone
 
 try:
@@ -24,6 +25,28 @@ except ImportError:
     OTEL_AVAILABLE = False
     trace = None
 
+# BatchSpanProcessor tuning: larger queue and batches, shorter flush
+# interval and a bounded export timeout so exports never stall the workflow.
+# Keyed by the standard OTEL_BSP_* variable that takes precedence when set.
+_BATCH_PROCESSOR_TUNING = {
+    "OTEL_BSP_MAX_QUEUE_SIZE": ("max_queue_size", 4096),
+    "OTEL_BSP_SCHEDULE_DELAY": ("schedule_delay_millis", 1000),
+    "OTEL_BSP_MAX_EXPORT_BATCH_SIZE": ("max_export_batch_size", 256),
+    "OTEL_BSP_EXPORT_TIMEOUT": ("export_timeout_millis", 10000),
+}
+
+
+def batch_processor_settings() -> Dict[str, int]:
+    """BatchSpanProcessor overrides whose OTEL_BSP_* variable is unset.
+
+    Variables that are set are left for the SDK to read and validate.
+    """
+    return {
+        kwarg: value
+        for env_var, (kwarg, value) in _BATCH_PROCESSOR_TUNING.items()
+        if env_var not in os.environ
+    }
+
 
 @dataclass
 class OTELConfig:
@@ -95,7 +118,7 @@ class OTELManager:
             )
             
             # Setup span processor
-            self.span_processor = BatchSpanProcessor(otlp_exporter)
+            self.span_processor = BatchSpanProcessor(otlp_exporter, **batch_processor_settings())
             provider.add_span_processor(self.span_processor)
             
             # Set global tracer provider
@@ -127,6 +150,26 @@ class OTELManager:
                 print(f"⚠️ Telemetry flush failed: {e}")
 
 
+@lru_cache(maxsize=256)
+def _parse_pr_url(pr_url: str) -> Dict[str, Any]:
+    """Parse a GitHub PR URL once; every span of a review shares the same URL"""
+    metadata = {"pr.url": pr_url}
+    
+    if pr_url and pr_url.startswith("https://github.com/"):
+        try:
+            parts = pr_url.rstrip('/').split('/')
+            metadata.update({
+                "pr.repository": f"{parts[3]}/{parts[4]}",
+                "pr.owner": parts[3],
+                "pr.repo": parts[4],
+                "pr.number": int(parts[6])
+            })
+        except (IndexError, ValueError):
+            pass
+    
+    return metadata
+
+
 class SpanManager:
     """Manages span creation and attribute setting"""
     
@@ -136,21 +179,8 @@ class SpanManager:
     
     def _extract_pr_metadata(self, pr_url: str) -> Dict[str, Any]:
         """Extract standardized PR metadata from GitHub URL"""
-        metadata = {"pr.url": pr_url}
-        
-        if pr_url and pr_url.startswith("https://github.com/"):
-            try:
-                parts = pr_url.rstrip('/').split('/')
-                metadata.update({
-                    "pr.repository": f"{parts[3]}/{parts[4]}",
-                    "pr.owner": parts[3],
-                    "pr.repo": parts[4],
-                    "pr.number": int(parts[6])
-                })
-            except (IndexError, ValueError):
-                pass
-        
-        return metadata
+        # Copy so callers can't mutate the cached entry
+        return dict(_parse_pr_url(pr_url))
     
     def create_span(self, operation_name: str, operation_type: str = None):
         """Create a new span with common attributes"""
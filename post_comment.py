@@ -5,13 +5,91 @@ Posts AI code review results as PR comments
 
 import requests
 import os
+import time
+from jinja2 import Environment
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
-from datetime import datetime
 
 # Load environment variables
 load_dotenv()
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 
+# Shared keep-alive session: retries transient GitHub API failures
+# (rate limits, 5xx) with exponential backoff instead of failing the review
+_RETRY = Retry(
+    total=5,
+    backoff_factor=0.5,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset(["GET", "POST"]),
+    respect_retry_after_header=True,
+    raise_on_status=False
+)
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(max_retries=_RETRY, pool_connections=4, pool_maxsize=10))
+_SESSION.headers["Accept-Encoding"] = "gzip"
+
+# Risk level emoji
+RISK_EMOJI = {
+    "low": "🟢",
+    "medium": "🟡",
+    "high": "🔴",
+    "critical": "🚨"
+}
+
+# Severity buckets in display order
+SEVERITY_SECTIONS = [
+    ("critical", "🚨 Critical Issues (Immediate Action Required)"),
+    ("high", "🔴 High Priority Issues"),
+    ("medium", "🟡 Medium Priority Issues"),
+    ("low", "🟢 Low Priority Issues"),
+]
+
+_REVIEW_COMMENT_SRC = """\
+## 🤖 Secure-PR-Guard AI Code Review
+
+**Analysis completed at:** {{ timestamp }}
+**PR:** {{ pr_url }}
+
+### {{ risk_emoji }} Risk Assessment: **{{ risk_level | upper }}**
+
+- **Total Issues Found:** {{ total_issues }}
+- **Security Issues:** {{ security_issues }}
+
+{% if not issues %}
+### ✅ Great job! No issues found
+
+Your code looks clean and secure. Keep up the good work! 🎉
+{% else %}
+{% for heading, bucket in sections if bucket %}
+### {{ heading }}
+
+{% for issue in bucket %}
+- **Line {{ issue['line'] }}** ({{ issue['type'] }}): {{ issue['comment'] }}
+{% endfor %}
+
+{% endfor %}
+{% endif %}
+{% if analysis_summary %}
+---
+### 📊 Analysis Details
+
+- **AI Detection:** {{ analysis_summary.get('ai_detected', 0) }} issues
+- **Security Rules:** {{ analysis_summary.get('rule_detected', 0) }} issues
+- **Total Unique:** {{ analysis_summary.get('total_unique', 0) }} issues
+
+{% endif %}
+---
+🔗 **Powered by Secure-PR-Guard** | 🛡️ **OWASP LLM Top 10 Compliant**
+
+*This is an automated review. Please verify critical security findings manually.*
+"""
+
+# Compiled once at import; format_review_comment only renders
+REVIEW_COMMENT_TEMPLATE = Environment(
+    autoescape=False, trim_blocks=True, lstrip_blocks=True
+).from_string(_REVIEW_COMMENT_SRC)
+
 def post_comment(pr_url: str, body: str) -> bool:
     """
     Post a comment to a GitHub PR
@@ -47,7 +125,7 @@ def post_comment(pr_url: str, body: str) -> bool:
         payload = {"body": body}
         
         # Post comment
-        response = requests.post(api_url, json=payload, headers=headers)
+        response = _SESSION.post(api_url, json=payload, headers=headers)
         
         if response.status_code == 201:
             print(f"✅ Comment posted successfully to {pr_url}")
@@ -71,116 +149,31 @@ def format_review_comment(review_result: dict, pr_url: str) -> str:
     Returns:
         str: Formatted markdown comment
     """
-    # Header
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S UTC")
-    lines = [
-        "## 🤖 Secure-PR-Guard AI Code Review",
-        "",
-        f"**Analysis completed at:** {timestamp}",
-        f"**PR:** {pr_url}",
-        ""
-    ]
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S UTC", time.gmtime())
     
     # Summary
     summary = review_result.get("summary", {})
     risk_level = summary.get("risk_level", "unknown")
-    total_issues = summary.get("total_issues", 0)
-    security_issues = summary.get("security_issues", 0)
     
-    # Risk level emoji
-    risk_emoji = {
-        "low": "🟢",
-        "medium": "🟡", 
-        "high": "🔴",
-        "critical": "🚨"
-    }.get(risk_level, "⚪")
-    
-    lines.extend([
-        f"### {risk_emoji} Risk Assessment: **{risk_level.upper()}**",
-        "",
-        f"- **Total Issues Found:** {total_issues}",
-        f"- **Security Issues:** {security_issues}",
-        ""
-    ])
-    
-    # Issues breakdown
+    # Group issues by severity in a single pass
     issues = review_result.get("issues", [])
+    buckets = {severity: [] for severity, _ in SEVERITY_SECTIONS}
+    for issue in issues:
+        bucket = buckets.get(issue.get("severity"))
+        if bucket is not None:
+            bucket.append(issue)
     
-    if not issues:
-        lines.extend([
-            "### ✅ Great job! No issues found",
-            "",
-            "Your code looks clean and secure. Keep up the good work! 🎉"
-        ])
-    else:
-        # Group issues by severity
-        critical_issues = [i for i in issues if i.get("severity") == "critical"]
-        high_issues = [i for i in issues if i.get("severity") == "high"]
-        medium_issues = [i for i in issues if i.get("severity") == "medium"]
-        low_issues = [i for i in issues if i.get("severity") == "low"]
-        
-        # Critical issues first
-        if critical_issues:
-            lines.extend([
-                "### 🚨 Critical Issues (Immediate Action Required)",
-                ""
-            ])
-            for issue in critical_issues:
-                lines.append(f"- **Line {issue['line']}** ({issue['type']}): {issue['comment']}")
-            lines.append("")
-        
-        # High priority issues
-        if high_issues:
-            lines.extend([
-                "### 🔴 High Priority Issues",
-                ""
-            ])
-            for issue in high_issues:
-                lines.append(f"- **Line {issue['line']}** ({issue['type']}): {issue['comment']}")
-            lines.append("")
-        
-        # Medium priority issues
-        if medium_issues:
-            lines.extend([
-                "### 🟡 Medium Priority Issues", 
-                ""
-            ])
-            for issue in medium_issues:
-                lines.append(f"- **Line {issue['line']}** ({issue['type']}): {issue['comment']}")
-            lines.append("")
-        
-        # Low priority issues
-        if low_issues:
-            lines.extend([
-                "### 🟢 Low Priority Issues",
-                ""
-            ])
-            for issue in low_issues:
-                lines.append(f"- **Line {issue['line']}** ({issue['type']}): {issue['comment']}")
-            lines.append("")
-    
-    # Analysis metadata
-    analysis_summary = review_result.get("analysis_summary", {})
-    if analysis_summary:
-        lines.extend([
-            "---",
-            "### 📊 Analysis Details",
-            "",
-            f"- **AI Detection:** {analysis_summary.get('ai_detected', 0)} issues",
-            f"- **Security Rules:** {analysis_summary.get('rule_detected', 0)} issues", 
-            f"- **Total Unique:** {analysis_summary.get('total_unique', 0)} issues",
-            ""
-        ])
-    
-    # Footer
-    lines.extend([
-        "---",
-        "🔗 **Powered by Secure-PR-Guard** | 🛡️ **OWASP LLM Top 10 Compliant**",
-        "",
-        "*This is an automated review. Please verify critical security findings manually.*"
-    ])
-    
-    return "\n".join(lines)
+    return REVIEW_COMMENT_TEMPLATE.render(
+        timestamp=timestamp,
+        pr_url=pr_url,
+        risk_emoji=RISK_EMOJI.get(risk_level, "⚪"),
+        risk_level=risk_level,
+        total_issues=summary.get("total_issues", 0),
+        security_issues=summary.get("security_issues", 0),
+        issues=issues,
+        sections=[(heading, buckets[severity]) for severity, heading in SEVERITY_SECTIONS],
+        analysis_summary=review_result.get("analysis_summary", {})
+    )
 
 def test_comment_formatting():
     """Test function for comment formatting"""
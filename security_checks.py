@@ -4,7 +4,42 @@ Implements detection patterns for AI-specific security vulnerabilities
 """
 
 import re
-from typing import List, Dict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import List, Dict, Tuple
+
+@dataclass
+class Issues:
+    """Security issues stored column-wise: index i of every list is one issue"""
+    lines: List[int] = field(default_factory=list)
+    severities: List[str] = field(default_factory=list)
+    comments: List[str] = field(default_factory=list)
+    categories: List[str] = field(default_factory=list)
+    
+    def __len__(self) -> int:
+        return len(self.lines)
+    
+    def append(self, line: int, severity: str, comment: str, category: str) -> None:
+        """Add one issue"""
+        self.lines.append(line)
+        self.severities.append(severity)
+        self.comments.append(comment)
+        self.categories.append(category)
+    
+    def to_dicts(self) -> List[Dict]:
+        """Row-wise issue dicts, as returned by run_llm_security_rules"""
+        return [
+            {
+                "line": line,
+                "type": "security",
+                "severity": severity,
+                "comment": comment,
+                "category": category
+            }
+            for line, severity, comment, category in zip(
+                self.lines, self.severities, self.comments, self.categories
+            )
+        ]
 
 def run_llm_security_rules(diff: str) -> List[Dict]:
     """
@@ -16,642 +51,758 @@ def run_llm_security_rules(diff: str) -> List[Dict]:
     Returns:
         List of security issues found
     """
-    issues = []
-    lines = diff.split('\n')
+    return scan_chunk(added_lines(diff))
+
+def run_llm_security_rules_batch(diffs: List[str]) -> List[List[Dict]]:
+    """
+    Run OWASP LLM security checks on many small diffs in one call
     
-    for line_num, line in enumerate(lines, 1):
-        # Only check added lines (lines starting with +)
-        if not line.startswith('+'):
-            continue
-            
-        clean_line = line[1:].strip()  # Remove + prefix and whitespace
-        
-        # Skip empty lines and comments
-        if not clean_line or clean_line.startswith('#') or clean_line.startswith('//'):
-            continue
-            
-        # LLM01: Prompt Injection Detection
-        llm01_issues = check_llm01_prompt_injection(clean_line, line_num)
-        issues.extend(llm01_issues or [])
-        
-        # LLM02: Insecure Output Handling Detection  
-        llm02_issues = check_llm02_insecure_output(clean_line, line_num)
-        issues.extend(llm02_issues or [])
-        
-        # LLM03: Training Data Poisoning / Prompt Leakage Detection
-        llm03_issues = check_llm03_prompt_leakage(clean_line, line_num)
-        issues.extend(llm03_issues or [])
-        
-        # LLM04: Model Denial of Service / Unsafe Function Calls
-        llm04_issues = check_llm04_unsafe_calls(clean_line, line_num)
-        issues.extend(llm04_issues or [])
-        
-        # LLM05: Supply-Chain Vulnerabilities / Authorization Bypass
-        llm05_issues = check_llm05_authz_bypass(clean_line, line_num)
-        issues.extend(llm05_issues or [])
-        
-        # LLM06: Sensitive Information Disclosure / Data Exfiltration  
-        llm06_issues = check_llm06_data_exfil(clean_line, line_num)
-        issues.extend(llm06_issues or [])
+    Equivalent to calling run_llm_security_rules on each entry, without
+    the per-call dispatch; handy for scanning lists of single-line cases.
+    
+    Args:
+        diffs: Diff snippets to analyze, typically one added line each
         
-        # LLM07: Insecure Plugin Design / DoS Vulnerabilities
-        llm07_issues = check_llm07_plugin_dos(clean_line, line_num)
-        issues.extend(llm07_issues or [])
+    Returns:
+        One list of security issues per input, in input order
+    """
+    return [scan_chunk(added_lines(diff)) for diff in diffs]
+
+def scan_issues(diff: str) -> Issues:
+    """
+    Run OWASP LLM security checks on git diff, returning column-wise Issues
+    
+    Same findings as run_llm_security_rules without building a dict per
+    issue; callers that only need a field or two can zip the columns.
+    
+    Args:
+        diff: Git diff content to analyze
         
-        # LLM08: Excessive Agency Detection
-        llm08_issues = check_llm08_excessive_agency(clean_line, line_num)
-        issues.extend(llm08_issues or [])
+    Returns:
+        Issues found, in diff order
+    """
+    return _scan_columns(added_lines(diff))
+
+def added_lines(diff: str) -> List[Tuple[int, str]]:
+    """
+    Pick the added lines (lines starting with +) out of a diff
+    
+    Line numbers count every line of the diff, split on '\n' only so that
+    stray \r or form feeds inside a line do not shift the numbering.
+    
+    Returns:
+        List of (line number, line) pairs
+    """
+    return [
+        (line_num, line)
+        for line_num, line in enumerate(diff.split('\n'), 1)
+        if line.startswith('+')
+    ]
+
+def scan_chunk(lines: List[Tuple[int, str]]) -> List[Dict]:
+    """
+    Scan a block of added diff lines
+    
+    Args:
+        lines: (line number, line) pairs as returned by added_lines
         
-        # LLM09: Overreliance Detection  
-        llm09_issues = check_llm09_overreliance(clean_line, line_num)
-        issues.extend(llm09_issues or [])
+    Returns:
+        List of security issues found in the block
+    """
+    return _scan_columns(lines).to_dicts()
+
+def _scan_columns(lines: List[Tuple[int, str]]) -> Issues:
+    """
+    Scan a block of added diff lines into column-wise Issues
+    """
+    issues = Issues()
+    
+    for line_num, line in lines:
+        clean_line = line[1:].strip()  # Remove + prefix and whitespace
         
-        # LLM10: Model Theft Detection
-        llm10_issues = check_llm10_model_theft(clean_line, line_num)
-        issues.extend(llm10_issues or [])
+        # Skip empty lines and comments
+        if not clean_line or clean_line.startswith(('#', '//')):
+            continue
         
-        # Additional security patterns
-        general_issues = check_general_security_patterns(clean_line, line_num)
-        issues.extend(general_issues or [])
+        for severity, comment, category in _scan_line(clean_line):
+            issues.append(line_num, severity, comment, category)
     
     return issues
 
-def check_llm01_prompt_injection(line: str, line_num: int) -> List[Dict]:
+@lru_cache(maxsize=4096)
+def _scan_line(clean_line: str) -> Tuple[Tuple[str, str, str], ...]:
     """
-    LLM01: Detect potential prompt injection vulnerabilities
+    Run every rule on one cleaned line
+    
+    Results depend only on the line text, so repeated lines (common across
+    diffs and test cases) are scanned once; scan_chunk adds the line number.
+    
+    Returns:
+        Tuple of (severity, comment, category) per issue, in reporting order
+    """
+    # Additional security patterns only: no LLM rule can match this line
+    if ANY_LLM_RULE_RE.search(clean_line):
+        checks = LINE_CHECKS
+    else:
+        checks = (check_general_security_patterns,)
+    
+    return tuple(
+        (issue["severity"], issue["comment"], issue["category"])
+        for check in checks
+        for issue in check(clean_line, 0)
+    )
+
+# Characters that end a pattern's leading literal run
+_REGEX_META = frozenset(".^$*+?{}[]()|\\")
+_QUANTIFIERS = frozenset("*+?{")
+
+def _has_top_level_branch(pattern: str) -> bool:
+    """
+    True if the pattern has a '|' outside any group or character class
+    """
+    depth = 0
+    in_class = False
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if in_class:
+            in_class = ch != "]"
+        elif ch == "[":
+            in_class = True
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "|" and depth == 0:
+            return True
+        i += 1
+    return False
+
+def _literal_prefix(pattern: str) -> str:
+    """
+    Literal text every match of the pattern starts with, e.g. "agent" for
+    r'agent.*\.transfer_money'. Returns "" when none can be derived.
+    """
+    if _has_top_level_branch(pattern):
+        return ""
+    
+    chars = []
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == "\\":
+            escaped = pattern[i + 1:i + 2]
+            # \s, \d, \b, backreferences, ... are not literals
+            if not escaped or escaped.isalnum():
+                break
+            ch, step = escaped, 2
+        elif ch in _REGEX_META:
+            break
+        else:
+            step = 1
+        # A quantified character is optional or repeated, so stop before it
+        if pattern[i + step:i + step + 1] in _QUANTIFIERS:
+            break
+        chars.append(ch)
+        i += step
+    return "".join(chars)
+
+def _rule_group(severity: str, comment: str, patterns: List[str], flags: int = 0) -> Tuple:
+    """
+    Compile a group of patterns that report the same severity and comment.
+    Patterns are compiled once at import instead of on every line scanned.
+    The category ("LLM01", "Security", ...) is the comment's prefix.
+    Each pattern also gets its literal prefix (lowercased for
+    case-insensitive groups) for a cheap substring check before the regex.
+    """
+    category = comment.split(":", 1)[0]
+    compiled = tuple(re.compile(pattern, flags) for pattern in patterns)
+    literals = tuple(
+        _literal_prefix(pattern).lower() if flags & re.IGNORECASE else _literal_prefix(pattern)
+        for pattern in patterns
+    )
+    return severity, comment, category, compiled, literals
+
+def _apply_rules(rules: Tuple, line: str, line_num: int) -> List[Dict]:
+    """
+    Report one issue per pattern that matches the line
     """
     issues = []
     
-    # Pattern 1: Template injection markers
-    template_patterns = [
-        r'\{\{.*\}\}',      # Jinja2-style: {{user_input}}
-        r'\$\{.*\}',        # Shell-style: ${user_input}
-        r'<.*>',            # XML-style: <user_input>
-        r'\[\[.*\]\]',      # Wiki-style: [[user_input]]
-    ]
+    # str.lower() only agrees with re.IGNORECASE on ASCII text (dotless i
+    # matches "i" but does not lowercase to it), so other lines skip the
+    # literal prefilter and go straight to the regex
+    ascii_line = line.isascii()
+    lowered = line.lower() if ascii_line else line
+    
+    for severity, comment, category, patterns, literals in rules:
+        text = lowered if patterns[0].flags & re.IGNORECASE else line
+        for pattern, literal in zip(patterns, literals):
+            if ascii_line and literal not in text:
+                continue
+            if pattern.search(line):
+                issues.append({
+                    "line": line_num,
+                    "type": "security",
+                    "severity": severity,
+                    "comment": comment,
+                    "category": category
+                })
     
-    for pattern in template_patterns:
-        if re.search(pattern, line):
-            issues.append({
-                "line": line_num,
-                "type": "security",
-                "severity": "high",
-                "comment": f"LLM01: Potential prompt injection vector detected - template pattern may allow user input manipulation"
-            })
+    return issues
+
+def _combine_rules(*rule_sets: Tuple) -> re.Pattern:
+    """
+    Fuse every pattern of the given rule sets into one alternation that
+    matches if and only if at least one of the individual patterns does.
+    Case-insensitive groups keep their flag via a scoped (?i:...) group.
     
+    Each LLMxx_RE gates its category with one C-level scan; only lines it
+    matches are re-checked pattern by pattern, which keeps the contract of
+    one issue per matching pattern.
+    """
+    alternatives = []
+    for rules in rule_sets:
+        for _, _, _, patterns, _ in rules:
+            for pattern in patterns:
+                scope = "?i:" if pattern.flags & re.IGNORECASE else "?:"
+                alternatives.append(f"({scope}{pattern.pattern})")
+    return re.compile("|".join(alternatives))
+
+LLM01_RULES = (
+    # Pattern 1: Template injection markers
+    _rule_group(
+        "high",
+        "LLM01: Potential prompt injection vector detected - template pattern may allow user input manipulation",
+        [
+            r'\{\{.*\}\}',      # Jinja2-style: {{user_input}}
+            r'\$\{.*\}',        # Shell-style: ${user_input}
+            r'<.*>',            # XML-style: <user_input>
+            r'\[\[.*\]\]',      # Wiki-style: [[user_input]]
+        ],
+    ),
     # Pattern 2: Direct string concatenation with user input
-    concat_patterns = [
-        r'["\'].*\+.*user.*["\']',
-        r'["\'].*\+.*input.*["\']',
-        r'["\'].*\+.*request.*["\']',
-        r'f["\'].*\{.*user.*\}.*["\']',  # f-string with user input
-    ]
-    
-    for pattern in concat_patterns:
-        if re.search(pattern, line, re.IGNORECASE):
-            issues.append({
-                "line": line_num,
-                "type": "security", 
-                "severity": "high",
-                "comment": "LLM01: Direct user input concatenation in prompt - vulnerable to injection attacks"
-            })
-    
+    _rule_group(
+        "high",
+        "LLM01: Direct user input concatenation in prompt - vulnerable to injection attacks",
+        [
+            r'["\'].*\+.*user.*["\']',
+            r'["\'].*\+.*input.*["\']',
+            r'["\'].*\+.*request.*["\']',
+            r'f["\'].*\{.*user.*\}.*["\']',  # f-string with user input
+        ],
+        flags=re.IGNORECASE
+    ),
     # Pattern 3: System prompt modification
-    system_prompt_patterns = [
-        r'system.*=.*\+',
-        r'role.*["\']system["\'].*\+',
-        r'prompt.*=.*user',
-    ]
-    
-    for pattern in system_prompt_patterns:
-        if re.search(pattern, line, re.IGNORECASE):
-            issues.append({
-                "line": line_num,
-                "type": "security",
-                "severity": "critical", 
-                "comment": "LLM01: System prompt modification with user input - critical injection risk"
-            })
-    
-    return issues
+    _rule_group(
+        "critical",
+        "LLM01: System prompt modification with user input - critical injection risk",
+        [
+            r'system.*=.*\+',
+            r'role.*["\']system["\'].*\+',
+            r'prompt.*=.*user',
+        ],
+        flags=re.IGNORECASE
+    ),
+)
 
-def check_llm02_insecure_output(line: str, line_num: int) -> List[Dict]:
+LLM01_RE = _combine_rules(LLM01_RULES)
+
+def check_llm01_prompt_injection(line: str, line_num: int) -> List[Dict]:
     """
-    LLM02: Detect insecure handling of LLM outputs
+    LLM01: Detect potential prompt injection vulnerabilities
     """
-    issues = []
-    
+    if not LLM01_RE.search(line):
+        return []
+    return _apply_rules(LLM01_RULES, line, line_num)
+
+LLM02_RULES = (
     # Pattern 1: Direct execution of LLM output
-    exec_patterns = [
-        r'exec\s*\(\s*.*response.*\)',
-        r'eval\s*\(\s*.*response.*\)',
-        r'exec\s*\(\s*.*output.*\)',
-        r'eval\s*\(\s*.*output.*\)',
-        r'subprocess.*\(.*response.*\)',
-        r'os\.system\s*\(\s*.*response.*\)',
-    ]
-    
-    for pattern in exec_patterns:
-        if re.search(pattern, line, re.IGNORECASE):
-            issues.append({
-                "line": line_num,
-                "type": "security",
-                "severity": "critical",
-                "comment": "LLM02: Direct execution of LLM output - extreme code injection risk"
-            })
-    
+    _rule_group(
+        "critical",
+        "LLM02: Direct execution of LLM output - extreme code injection risk",
+        [
+            r'exec\s*\(\s*.*response.*\)',
+            r'eval\s*\(\s*.*response.*\)',
+            r'exec\s*\(\s*.*output.*\)',
+            r'eval\s*\(\s*.*output.*\)',
+            r'subprocess.*\(.*response.*\)',
+            r'os\.system\s*\(\s*.*response.*\)',
+        ],
+        flags=re.IGNORECASE
+    ),
     # Pattern 2: Unsafe deserialization of LLM output
-    deserial_patterns = [
-        r'pickle\.loads\s*\(\s*.*response.*\)',
-        r'json\.loads\s*\(\s*.*response.*\)',
-        r'yaml\.load\s*\(\s*.*response.*\)',
-        r'marshal\.loads\s*\(\s*.*response.*\)',
-    ]
-    
-    for pattern in deserial_patterns:
-        if re.search(pattern, line, re.IGNORECASE):
-            issues.append({
-                "line": line_num,
-                "type": "security",
-                "severity": "high",
-                "comment": "LLM02: Unsafe deserialization of LLM output - potential remote code execution"
-            })
-    
+    _rule_group(
+        "high",
+        "LLM02: Unsafe deserialization of LLM output - potential remote code execution",
+        [
+            r'pickle\.loads\s*\(\s*.*response.*\)',
+            r'json\.loads\s*\(\s*.*response.*\)',
+            r'yaml\.load\s*\(\s*.*response.*\)',
+            r'marshal\.loads\s*\(\s*.*response.*\)',
+        ],
+        flags=re.IGNORECASE
+    ),
     # Pattern 3: SQL query construction with LLM output
-    sql_patterns = [
-        r'execute\s*\(\s*.*response.*\)',
-        r'query\s*=.*response',
-        r'SELECT.*\+.*response',
-        r'INSERT.*\+.*response',
-        r'UPDATE.*\+.*response',
-        r'DELETE.*\+.*response',
-    ]
-    
-    for pattern in sql_patterns:
-        if re.search(pattern, line, re.IGNORECASE):
-            issues.append({
-                "line": line_num,
-                "type": "security",
-                "severity": "high",
-                "comment": "LLM02: SQL query construction with LLM output - SQL injection risk"
-            })
-    
+    _rule_group(
+        "high",
+        "LLM02: SQL query construction with LLM output - SQL injection risk",
+        [
+            r'execute\s*\(\s*.*response.*\)',
+            r'query\s*=.*response',
+            r'SELECT.*\+.*response',
+            r'INSERT.*\+.*response',
+            r'UPDATE.*\+.*response',
+            r'DELETE.*\+.*response',
+        ],
+        flags=re.IGNORECASE
+    ),
     # Pattern 4: File operations with LLM output
-    file_patterns = [
-        r'open\s*\(\s*.*response.*\)',
-        r'write\s*\(\s*.*response.*\)',
-        r'os\.path\.join\s*\(\s*.*response.*\)',
-        r'pathlib.*\(.*response.*\)',
-    ]
-    
-    for pattern in file_patterns:
-        if re.search(pattern, line, re.IGNORECASE):
-            issues.append({
-                "line": line_num,
-                "type": "security",
-                "severity": "medium",
-                "comment": "LLM02: File operations with LLM output - path traversal risk"
-            })
-    
-    return issues
+    _rule_group(
+        "medium",
+        "LLM02: File operations with LLM output - path traversal risk",
+        [
+            r'open\s*\(\s*.*response.*\)',
+            r'write\s*\(\s*.*response.*\)',
+            r'os\.path\.join\s*\(\s*.*response.*\)',
+            r'pathlib.*\(.*response.*\)',
+        ],
+        flags=re.IGNORECASE
+    ),
+)
 
-def check_llm03_prompt_leakage(line: str, line_num: int) -> List[Dict]:
+LLM02_RE = _combine_rules(LLM02_RULES)
+
+def check_llm02_insecure_output(line: str, line_num: int) -> List[Dict]:
     """
-    LLM03: Training Data Poisoning / Prompt Leakage Detection
+    LLM02: Detect insecure handling of LLM outputs
     """
-    issues = []
-    
+    if not LLM02_RE.search(line):
+        return []
+    return _apply_rules(LLM02_RULES, line, line_num)
+
+LLM03_RULES = (
     # Pattern 1: System prompt exposure in logs/prints
-    prompt_exposure_patterns = [
-        r'print\s*\(\s*.*system.*prompt.*\)',
-        r'log.*\(\s*.*system.*prompt.*\)',
-        r'console\.log\s*\(\s*.*system.*prompt.*\)',
-        r'print\s*\(\s*.*internal.*instruction.*\)',
-        r'print\s*\(\s*.*you\s+are\s+a.*\)',
-    ]
-    
-    for pattern in prompt_exposure_patterns:
-        if re.search(pattern, line, re.IGNORECASE):
-            issues.append({
-                "line": line_num,
-                "type": "security",
-                "severity": "high",
-                "comment": "LLM03: System prompt exposure detected - may leak internal instructions to users"
-            })
-    
+    _rule_group(
+        "high",
+        "LLM03: System prompt exposure detected - may leak internal instructions to users",
+        [
+            r'print\s*\(\s*.*system.*prompt.*\)',
+            r'log.*\(\s*.*system.*prompt.*\)',
+            r'console\.log\s*\(\s*.*system.*prompt.*\)',
+            r'print\s*\(\s*.*internal.*instruction.*\)',
+            r'print\s*\(\s*.*you\s+are\s+a.*\)',
+        ],
+        flags=re.IGNORECASE
+    ),
     # Pattern 2: Debug output containing prompts
-    debug_patterns = [
-        r'debug.*prompt',
-        r'trace.*prompt',
-        r'verbose.*system',
-        r'dump.*prompt',
-    ]
-    
-    for pattern in debug_patterns:
-        if re.search(pattern, line, re.IGNORECASE):
-            issues.append({
-                "line": line_num,
-                "type": "security",
-                "severity": "medium",
-                "comment": "LLM03: Debug output may expose prompts - ensure production debug is disabled"
-            })
-    
-    return issues
+    _rule_group(
+        "medium",
+        "LLM03: Debug output may expose prompts - ensure production debug is disabled",
+        [
+            r'debug.*prompt',
+            r'trace.*prompt',
+            r'verbose.*system',
+            r'dump.*prompt',
+        ],
+        flags=re.IGNORECASE
+    ),
+)
 
-def check_llm04_unsafe_calls(line: str, line_num: int) -> List[Dict]:
+LLM03_RE = _combine_rules(LLM03_RULES)
+
+def check_llm03_prompt_leakage(line: str, line_num: int) -> List[Dict]:
     """
-    LLM04: Model Denial of Service / Unsafe Function Calls
+    LLM03: Training Data Poisoning / Prompt Leakage Detection
     """
-    issues = []
-    
+    if not LLM03_RE.search(line):
+        return []
+    return _apply_rules(LLM03_RULES, line, line_num)
+
+LLM04_RULES = (
     # Pattern 1: Direct system command execution
-    system_call_patterns = [
-        r'subprocess\.call\s*\(',
-        r'subprocess\.run\s*\(',
-        r'subprocess\.Popen\s*\(',
-        r'os\.system\s*\(',
-        r'os\.popen\s*\(',
-        r'os\.spawn\w+\s*\(',
-        r'commands\.getoutput\s*\(',
-    ]
-    
-    for pattern in system_call_patterns:
-        if re.search(pattern, line):
-            issues.append({
-                "line": line_num,
-                "type": "security",
-                "severity": "critical",
-                "comment": "LLM04: Direct system command execution - high risk for DoS and RCE attacks"
-            })
-    
+    _rule_group(
+        "critical",
+        "LLM04: Direct system command execution - high risk for DoS and RCE attacks",
+        [
+            r'subprocess\.call\s*\(',
+            r'subprocess\.run\s*\(',
+            r'subprocess\.Popen\s*\(',
+            r'os\.system\s*\(',
+            r'os\.popen\s*\(',
+            r'os\.spawn\w+\s*\(',
+            r'commands\.getoutput\s*\(',
+        ],
+    ),
     # Pattern 2: Dynamic code execution
-    dynamic_exec_patterns = [
-        r'\beval\s*\(',
-        r'\bexec\s*\(',
-        r'compile\s*\(',
-        r'__import__\s*\(',
-        r'globals\s*\(\)',
-        r'locals\s*\(\)',
-    ]
-    
-    for pattern in dynamic_exec_patterns:
-        if re.search(pattern, line):
-            issues.append({
-                "line": line_num,
-                "type": "security",
-                "severity": "critical",
-                "comment": "LLM04: Dynamic code execution detected - vulnerable to injection and DoS"
-            })
-    
+    _rule_group(
+        "critical",
+        "LLM04: Dynamic code execution detected - vulnerable to injection and DoS",
+        [
+            r'\beval\s*\(',
+            r'\bexec\s*\(',
+            r'compile\s*\(',
+            r'__import__\s*\(',
+            r'globals\s*\(\)',
+            r'locals\s*\(\)',
+        ],
+    ),
     # Pattern 3: Resource-intensive operations
-    resource_intensive_patterns = [
-        r'while\s+True\s*:',
-        r'for\s+\w+\s+in\s+range\s*\(\s*\d{6,}\s*\)',  # Large loops
-        r'time\.sleep\s*\(\s*\d{3,}\s*\)',  # Long sleeps
-        r'threading\.Thread\s*\(',
-        r'multiprocessing\.',
-        r'asyncio\.create_task\s*\(',
-    ]
-    
-    for pattern in resource_intensive_patterns:
-        if re.search(pattern, line):
-            issues.append({
-                "line": line_num,
-                "type": "security",
-                "severity": "medium",
-                "comment": "LLM04: Resource-intensive operation - potential DoS vector if user-controlled"
-            })
-    
-    return issues
+    _rule_group(
+        "medium",
+        "LLM04: Resource-intensive operation - potential DoS vector if user-controlled",
+        [
+            r'while\s+True\s*:',
+            r'for\s+\w+\s+in\s+range\s*\(\s*\d{6,}\s*\)',  # Large loops
+            r'time\.sleep\s*\(\s*\d{3,}\s*\)',  # Long sleeps
+            r'threading\.Thread\s*\(',
+            r'multiprocessing\.',
+            r'asyncio\.create_task\s*\(',
+        ],
+    ),
+)
 
-def check_llm05_authz_bypass(line: str, line_num: int) -> List[Dict]:
+LLM04_RE = _combine_rules(LLM04_RULES)
+
+def check_llm04_unsafe_calls(line: str, line_num: int) -> List[Dict]:
     """
-    LLM05: Supply-Chain Vulnerabilities / Authorization Bypass Detection
+    LLM04: Model Denial of Service / Unsafe Function Calls
     """
-    issues = []
-    
+    if not LLM04_RE.search(line):
+        return []
+    return _apply_rules(LLM04_RULES, line, line_num)
+
+LLM05_RULES = (
     # Pattern 1: Authorization bypass attempts
-    authz_bypass_patterns = [
-        r'role\s*=\s*["\']admin["\']',
-        r'role\s*=\s*["\']root["\']',
-        r'is_admin\s*=\s*True',
-        r'bypass.*auth',
-        r'skip.*permission',
-        r'ignore.*role',
-        r'override.*access',
-    ]
-    
-    for pattern in authz_bypass_patterns:
-        if re.search(pattern, line, re.IGNORECASE):
-            issues.append({
-                "line": line_num,
-                "type": "security",
-                "severity": "high",
-                "comment": "LLM05: Authorization bypass attempt detected - hardcoded admin privileges"
-            })
-    
+    _rule_group(
+        "high",
+        "LLM05: Authorization bypass attempt detected - hardcoded admin privileges",
+        [
+            r'role\s*=\s*["\']admin["\']',
+            r'role\s*=\s*["\']root["\']',
+            r'is_admin\s*=\s*True',
+            r'bypass.*auth',
+            r'skip.*permission',
+            r'ignore.*role',
+            r'override.*access',
+        ],
+        flags=re.IGNORECASE
+    ),
     # Pattern 2: Dangerous supply chain imports
-    dangerous_imports = [
-        r'from\s+\w+\s+import\s+\*',  # Wildcard imports
-        r'__import__\s*\(\s*["\'][^"\']*["\'].*\)',  # Dynamic imports
-        r'importlib\.import_module\s*\(',
-        r'pip\.main\s*\(',  # Runtime pip installs
-        r'subprocess.*pip\s+install',
-    ]
-    
-    for pattern in dangerous_imports:
-        if re.search(pattern, line, re.IGNORECASE):
-            issues.append({
-                "line": line_num,
-                "type": "security", 
-                "severity": "medium",
-                "comment": "LLM05: Supply chain vulnerability - unsafe import or dynamic dependency loading"
-            })
-    
-    return issues
+    _rule_group(
+        "medium",
+        "LLM05: Supply chain vulnerability - unsafe import or dynamic dependency loading",
+        [
+            r'from\s+\w+\s+import\s+\*',  # Wildcard imports
+            r'__import__\s*\(\s*["\'][^"\']*["\'].*\)',  # Dynamic imports
+            r'importlib\.import_module\s*\(',
+            r'pip\.main\s*\(',  # Runtime pip installs
+            r'subprocess.*pip\s+install',
+        ],
+        flags=re.IGNORECASE
+    ),
+)
 
-def check_llm06_data_exfil(line: str, line_num: int) -> List[Dict]:
+LLM05_RE = _combine_rules(LLM05_RULES)
+
+def check_llm05_authz_bypass(line: str, line_num: int) -> List[Dict]:
     """
-    LLM06: Sensitive Information Disclosure / Data Exfiltration Detection
+    LLM05: Supply-Chain Vulnerabilities / Authorization Bypass Detection
     """
-    issues = []
-    
+    if not LLM05_RE.search(line):
+        return []
+    return _apply_rules(LLM05_RULES, line, line_num)
+
+LLM06_RULES = (
     # Pattern 1: Data exfiltration via external requests
-    exfil_patterns = [
-        r'requests\.post\s*\(\s*["\']http[^"\']*["\'].*data',
-        r'urllib\.request.*urlopen.*data',
-        r'curl.*--data',
-        r'wget.*--post-data',
-    ]
-    
-    for pattern in exfil_patterns:
-        if re.search(pattern, line, re.IGNORECASE):
-            issues.append({
-                "line": line_num,
-                "type": "security",
-                "severity": "high",
-                "comment": "LLM06: Potential data exfiltration - external POST request with data"
-            })
-    
+    _rule_group(
+        "high",
+        "LLM06: Potential data exfiltration - external POST request with data",
+        [
+            r'requests\.post\s*\(\s*["\']http[^"\']*["\'].*data',
+            r'urllib\.request.*urlopen.*data',
+            r'curl.*--data',
+            r'wget.*--post-data',
+        ],
+        flags=re.IGNORECASE
+    ),
     # Pattern 2: Sensitive data exposure in logs
-    log_exposure_patterns = [
-        r'log.*password',
-        r'print.*password',
-        r'console\.log.*password',
-        r'log.*secret',
-        r'print.*token',
-        r'log.*api.*key',
-    ]
-    
-    for pattern in log_exposure_patterns:
-        if re.search(pattern, line, re.IGNORECASE):
-            issues.append({
-                "line": line_num,
-                "type": "security",
-                "severity": "high", 
-                "comment": "LLM06: Sensitive data exposure in logs - potential information disclosure"
-            })
-    
-    return issues
+    _rule_group(
+        "high",
+        "LLM06: Sensitive data exposure in logs - potential information disclosure",
+        [
+            r'log.*password',
+            r'print.*password',
+            r'console\.log.*password',
+            r'log.*secret',
+            r'print.*token',
+            r'log.*api.*key',
+        ],
+        flags=re.IGNORECASE
+    ),
+)
 
-def check_llm07_plugin_dos(line: str, line_num: int) -> List[Dict]:
+LLM06_RE = _combine_rules(LLM06_RULES)
+
+def check_llm06_data_exfil(line: str, line_num: int) -> List[Dict]:
     """
-    LLM07: Insecure Plugin Design / DoS Vulnerabilities Detection
+    LLM06: Sensitive Information Disclosure / Data Exfiltration Detection
     """
-    issues = []
-    
+    if not LLM06_RE.search(line):
+        return []
+    return _apply_rules(LLM06_RULES, line, line_num)
+
+LLM07_RULES = (
     # Pattern 1: Resource exhaustion attacks
-    resource_exhaustion = [
-        r'while\s+True\s*:',  # Infinite loops
-        r'for\s+\w+\s+in\s+range\s*\(\s*(?:\d{7,}|\w+\s*\*\s*\w+)\s*\)',  # Very large loops
-        r'time\.sleep\s*\(\s*(?:\d{4,}|\w+\s*\*\s*\w+)\s*\)',  # Long sleeps
-    ]
-    
-    for pattern in resource_exhaustion:
-        if re.search(pattern, line):
-            issues.append({
-                "line": line_num,
-                "type": "security",
-                "severity": "high",
-                "comment": "LLM07: Resource exhaustion vulnerability - potential DoS via CPU/time consumption"
-            })
-    
+    _rule_group(
+        "high",
+        "LLM07: Resource exhaustion vulnerability - potential DoS via CPU/time consumption",
+        [
+            r'while\s+True\s*:',  # Infinite loops
+            r'for\s+\w+\s+in\s+range\s*\(\s*(?:\d{7,}|\w+\s*\*\s*\w+)\s*\)',  # Very large loops
+            r'time\.sleep\s*\(\s*(?:\d{4,}|\w+\s*\*\s*\w+)\s*\)',  # Long sleeps
+        ],
+    ),
     # Pattern 2: Insecure plugin loading
-    insecure_plugin_patterns = [
-        r'importlib\.import_module\s*\(\s*.*user.*\)',
-        r'__import__\s*\(\s*.*input.*\)',
-        r'exec\s*\(\s*.*plugin.*\)',
-        r'eval\s*\(\s*.*plugin.*\)',
-    ]
-    
-    for pattern in insecure_plugin_patterns:
-        if re.search(pattern, line, re.IGNORECASE):
-            issues.append({
-                "line": line_num,
-                "type": "security",
-                "severity": "critical",
-                "comment": "LLM07: Insecure plugin loading - dynamic code execution with user input"
-            })
-    
-    return issues
+    _rule_group(
+        "critical",
+        "LLM07: Insecure plugin loading - dynamic code execution with user input",
+        [
+            r'importlib\.import_module\s*\(\s*.*user.*\)',
+            r'__import__\s*\(\s*.*input.*\)',
+            r'exec\s*\(\s*.*plugin.*\)',
+            r'eval\s*\(\s*.*plugin.*\)',
+        ],
+        flags=re.IGNORECASE
+    ),
+)
 
-def check_llm08_excessive_agency(line: str, line_num: int) -> List[Dict]:
+LLM07_RE = _combine_rules(LLM07_RULES)
+
+def check_llm07_plugin_dos(line: str, line_num: int) -> List[Dict]:
     """
-    LLM08: Excessive Agency Detection
+    LLM07: Insecure Plugin Design / DoS Vulnerabilities Detection
     """
-    issues = []
-    
+    if not LLM07_RE.search(line):
+        return []
+    return _apply_rules(LLM07_RULES, line, line_num)
+
+LLM08_RULES = (
     # Pattern 1: Unrestricted system access
-    excessive_permissions = [
-        r'agent.*\.execute_system_command',
-        r'ai.*\.run_shell_command',
-        r'bot.*\.system\s*\(',
-        r'llm.*\.exec\s*\(',
-        r'agent.*permissions.*=.*\[\s*["\'].*\*.*["\']',
-        r'ai.*\.sudo\s*\(',
-        r'agent.*root.*access',
-    ]
-    
-    for pattern in excessive_permissions:
-        if re.search(pattern, line, re.IGNORECASE):
-            issues.append({
-                "line": line_num,
-                "type": "security",
-                "severity": "critical",
-                "comment": "LLM08: Excessive agency - AI agent granted unrestricted system access"
-            })
-    
+    _rule_group(
+        "critical",
+        "LLM08: Excessive agency - AI agent granted unrestricted system access",
+        [
+            r'agent.*\.execute_system_command',
+            r'ai.*\.run_shell_command',
+            r'bot.*\.system\s*\(',
+            r'llm.*\.exec\s*\(',
+            r'agent.*permissions.*=.*\[\s*["\'].*\*.*["\']',
+            r'ai.*\.sudo\s*\(',
+            r'agent.*root.*access',
+        ],
+        flags=re.IGNORECASE
+    ),
     # Pattern 2: Financial transaction capabilities
-    financial_access = [
-        r'agent.*\.transfer_money',
-        r'ai.*\.make_payment',
-        r'bot.*\.purchase',
-        r'llm.*\.buy\s*\(',
-        r'agent.*\.credit_card',
-        r'ai.*\.bank_transfer',
-    ]
-    
-    for pattern in financial_access:
-        if re.search(pattern, line, re.IGNORECASE):
-            issues.append({
-                "line": line_num,
-                "type": "security",
-                "severity": "critical",
-                "comment": "LLM08: Excessive agency - AI agent has financial transaction capabilities"
-            })
-    
-    return issues
+    _rule_group(
+        "critical",
+        "LLM08: Excessive agency - AI agent has financial transaction capabilities",
+        [
+            r'agent.*\.transfer_money',
+            r'ai.*\.make_payment',
+            r'bot.*\.purchase',
+            r'llm.*\.buy\s*\(',
+            r'agent.*\.credit_card',
+            r'ai.*\.bank_transfer',
+        ],
+        flags=re.IGNORECASE
+    ),
+)
 
-def check_llm09_overreliance(line: str, line_num: int) -> List[Dict]:
+LLM08_RE = _combine_rules(LLM08_RULES)
+
+def check_llm08_excessive_agency(line: str, line_num: int) -> List[Dict]:
     """
-    LLM09: Overreliance Detection
+    LLM08: Excessive Agency Detection
     """
-    issues = []
-    
+    if not LLM08_RE.search(line):
+        return []
+    return _apply_rules(LLM08_RULES, line, line_num)
+
+LLM09_RULES = (
     # Pattern 1: Automatic execution without validation
-    auto_execution = [
-        r'auto_execute\s*\(\s*ai_response\s*\)',
-        r'immediate_action\s*\(\s*llm_output\s*\)',
-        r'execute_without_review\s*\(',
-        r'auto_approve\s*\(\s*ai.*\)',
-        r'bypass_human_review',
-        r'skip_validation.*ai',
-    ]
-    
-    for pattern in auto_execution:
-        if re.search(pattern, line, re.IGNORECASE):
-            issues.append({
-                "line": line_num,
-                "type": "security",
-                "severity": "critical",
-                "comment": "LLM09: Overreliance - automatic execution of AI output without human validation"
-            })
-    
+    _rule_group(
+        "critical",
+        "LLM09: Overreliance - automatic execution of AI output without human validation",
+        [
+            r'auto_execute\s*\(\s*ai_response\s*\)',
+            r'immediate_action\s*\(\s*llm_output\s*\)',
+            r'execute_without_review\s*\(',
+            r'auto_approve\s*\(\s*ai.*\)',
+            r'bypass_human_review',
+            r'skip_validation.*ai',
+        ],
+        flags=re.IGNORECASE
+    ),
     # Pattern 2: Critical decisions based solely on AI
-    critical_decisions = [
-        r'if\s+ai_says.*:\s*delete',
-        r'if\s+llm_recommends.*:\s*approve',
-        r'medical_diagnosis\s*=\s*ai_response',
-        r'financial_decision\s*=\s*llm_output',
-        r'autonomous_mode\s*=\s*True',
-        r'human_oversight\s*=\s*False',
-    ]
-    
-    for pattern in critical_decisions:
-        if re.search(pattern, line, re.IGNORECASE):
-            issues.append({
-                "line": line_num,
-                "type": "security",
-                "severity": "critical",
-                "comment": "LLM09: Overreliance - critical decisions made solely based on AI output"
-            })
-    
-    return issues
+    _rule_group(
+        "critical",
+        "LLM09: Overreliance - critical decisions made solely based on AI output",
+        [
+            r'if\s+ai_says.*:\s*delete',
+            r'if\s+llm_recommends.*:\s*approve',
+            r'medical_diagnosis\s*=\s*ai_response',
+            r'financial_decision\s*=\s*llm_output',
+            r'autonomous_mode\s*=\s*True',
+            r'human_oversight\s*=\s*False',
+        ],
+        flags=re.IGNORECASE
+    ),
+)
 
-def check_llm10_model_theft(line: str, line_num: int) -> List[Dict]:
+LLM09_RE = _combine_rules(LLM09_RULES)
+
+def check_llm09_overreliance(line: str, line_num: int) -> List[Dict]:
     """
-    LLM10: Model Theft Detection
+    LLM09: Overreliance Detection
     """
-    issues = []
-    
+    if not LLM09_RE.search(line):
+        return []
+    return _apply_rules(LLM09_RULES, line, line_num)
+
+LLM10_RULES = (
     # Pattern 1: Model architecture probing
-    architecture_probing = [
-        r'model\.layers\.',
-        r'get_model_architecture',
-        r'extract_weights',
-        r'model\.parameters\(\)',
-        r'model_size\s*\(',
-        r'hidden_layers.*count',
-        r'model\.config\.',
-    ]
-    
-    for pattern in architecture_probing:
-        if re.search(pattern, line, re.IGNORECASE):
-            issues.append({
-                "line": line_num,
-                "type": "security",
-                "severity": "high",
-                "comment": "LLM10: Model theft - attempt to probe model architecture or extract parameters"
-            })
-    
+    _rule_group(
+        "high",
+        "LLM10: Model theft - attempt to probe model architecture or extract parameters",
+        [
+            r'model\.layers\.',
+            r'get_model_architecture',
+            r'extract_weights',
+            r'model\.parameters\(\)',
+            r'model_size\s*\(',
+            r'hidden_layers.*count',
+            r'model\.config\.',
+        ],
+        flags=re.IGNORECASE
+    ),
     # Pattern 2: Training data extraction attempts
-    training_data_extraction = [
-        r'extract_training_data',
-        r'get_training_examples',
-        r'memorized_data',
-        r'training_set_leak',
-        r'dataset_extraction',
-    ]
-    
-    for pattern in training_data_extraction:
-        if re.search(pattern, line, re.IGNORECASE):
-            issues.append({
-                "line": line_num,
-                "type": "security",
-                "severity": "critical",
-                "comment": "LLM10: Model theft - attempt to extract training data from model"
-            })
-    
+    _rule_group(
+        "critical",
+        "LLM10: Model theft - attempt to extract training data from model",
+        [
+            r'extract_training_data',
+            r'get_training_examples',
+            r'memorized_data',
+            r'training_set_leak',
+            r'dataset_extraction',
+        ],
+        flags=re.IGNORECASE
+    ),
     # Pattern 3: Model distillation/copying
-    model_copying = [
-        r'distill_model',
-        r'copy_model_behavior',
-        r'clone_model',
-        r'replicate_model',
-        r'model_mimicry',
-    ]
-    
-    for pattern in model_copying:
-        if re.search(pattern, line, re.IGNORECASE):
-            issues.append({
-                "line": line_num,
-                "type": "security",
-                "severity": "critical",
-                "comment": "LLM10: Model theft - attempt to distill or copy model behavior"
-            })
-    
-    return issues
+    _rule_group(
+        "critical",
+        "LLM10: Model theft - attempt to distill or copy model behavior",
+        [
+            r'distill_model',
+            r'copy_model_behavior',
+            r'clone_model',
+            r'replicate_model',
+            r'model_mimicry',
+        ],
+        flags=re.IGNORECASE
+    ),
+)
+
+LLM10_RE = _combine_rules(LLM10_RULES)
+
+def check_llm10_model_theft(line: str, line_num: int) -> List[Dict]:
+    """
+    LLM10: Model Theft Detection
+    """
+    if not LLM10_RE.search(line):
+        return []
+    return _apply_rules(LLM10_RULES, line, line_num)
+
+# Single-pass prefilter over all LLM01-LLM10 patterns: lines it rejects
+# cannot trigger any LLM rule, so the per-category checks are skipped
+ANY_LLM_RULE_RE = _combine_rules(
+    LLM01_RULES, LLM02_RULES, LLM03_RULES, LLM04_RULES, LLM05_RULES,
+    LLM06_RULES, LLM07_RULES, LLM08_RULES, LLM09_RULES, LLM10_RULES,
+)
+
+# Additional security patterns fused into one alternation so a clean line
+# costs a single regex scan. Hardcoded secrets are case-insensitive, unsafe
+# imports are not, hence the scoped (?i:...) flags.
+GENERAL_SECURITY_RE = re.compile(
+    r'(?P<password>(?i:password)\s*=\s*["\'][^"\']+["\'])'
+    r'|(?P<api_key>(?i:api_key)\s*=\s*["\'][^"\']+["\'])'
+    r'|(?P<secret>(?i:secret)\s*=\s*["\'][^"\']+["\'])'
+    r'|(?P<token>(?i:token)\s*=\s*["\'][^"\']+["\'])'
+    r'|(?P<openai_key>(?i:sk-[a-zA-Z0-9]{32,}))'
+    r'|(?P<import_pickle>import\s+pickle)'
+    r'|(?P<from_pickle>from\s+pickle\s+import)'
+    r'|(?P<import_marshal>import\s+marshal)'
+)
+
+# Group name -> (severity, comment), in reporting order
+GENERAL_SECURITY_RULES = {
+    "password": ("critical", "Security: Hardcoded password detected - use environment variables instead"),
+    "api_key": ("critical", "Security: Hardcoded API key detected - use environment variables instead"),
+    "secret": ("critical", "Security: Hardcoded secret detected - use environment variables instead"),
+    "token": ("critical", "Security: Hardcoded token detected - use environment variables instead"),
+    "openai_key": ("critical", "Security: OpenAI API key detected - use environment variables instead"),
+    "import_pickle": ("medium", "Security: Pickle module can execute arbitrary code"),
+    "from_pickle": ("medium", "Security: Pickle module can execute arbitrary code"),
+    "import_marshal": ("medium", "Security: Marshal module can execute arbitrary code"),
+}
 
 def check_general_security_patterns(line: str, line_num: int) -> List[Dict]:
     """
     Additional security patterns beyond OWASP LLM Top 10
     """
-    issues = []
-    
-    # Hardcoded secrets
-    secret_patterns = [
-        (r'password\s*=\s*["\'][^"\']+["\']', "Hardcoded password detected"),
-        (r'api_key\s*=\s*["\'][^"\']+["\']', "Hardcoded API key detected"),
-        (r'secret\s*=\s*["\'][^"\']+["\']', "Hardcoded secret detected"),
-        (r'token\s*=\s*["\'][^"\']+["\']', "Hardcoded token detected"),
-        (r'sk-[a-zA-Z0-9]{32,}', "OpenAI API key detected"),
-    ]
-    
-    for pattern, message in secret_patterns:
-        if re.search(pattern, line, re.IGNORECASE):
-            issues.append({
-                "line": line_num,
-                "type": "security",
-                "severity": "critical",
-                "comment": f"Security: {message} - use environment variables instead"
-            })
-    
-    # Unsafe imports
-    unsafe_imports = [
-        (r'import\s+pickle', "Pickle module can execute arbitrary code"),
-        (r'from\s+pickle\s+import', "Pickle module can execute arbitrary code"),
-        (r'import\s+marshal', "Marshal module can execute arbitrary code"),
+    hits = set()
+    
+    # Resume one character past each match start rather than at its end, so
+    # a hit nested inside another (e.g. an sk- key in api_key = "...") is
+    # still reported
+    match = GENERAL_SECURITY_RE.search(line)
+    while match:
+        hits.add(match.lastgroup)
+        match = GENERAL_SECURITY_RE.search(line, match.start() + 1)
+    
+    if not hits:
+        return []
+    
+    return [
+        {
+            "line": line_num,
+            "type": "security",
+            "severity": severity,
+            "comment": comment,
+            "category": "Security"
+        }
+        for name, (severity, comment) in GENERAL_SECURITY_RULES.items()
+        if name in hits
     ]
-    
-    for pattern, message in unsafe_imports:
-        if re.search(pattern, line):
-            issues.append({
-                "line": line_num,
-                "type": "security",
-                "severity": "medium",
-                "comment": f"Security: {message}"
-            })
-    
-    return issues
+
+# Per-line checks in reporting order, iterated by scan_chunk
+LINE_CHECKS = (
+    check_llm01_prompt_injection,   # LLM01: Prompt Injection
+    check_llm02_insecure_output,    # LLM02: Insecure Output Handling
+    check_llm03_prompt_leakage,     # LLM03: Training Data Poisoning / Prompt Leakage
+    check_llm04_unsafe_calls,       # LLM04: Model Denial of Service / Unsafe Function Calls
+    check_llm05_authz_bypass,       # LLM05: Supply-Chain Vulnerabilities / Authorization Bypass
+    check_llm06_data_exfil,         # LLM06: Sensitive Information Disclosure / Data Exfiltration
+    check_llm07_plugin_dos,         # LLM07: Insecure Plugin Design / DoS Vulnerabilities
+    check_llm08_excessive_agency,   # LLM08: Excessive Agency
+    check_llm09_overreliance,       # LLM09: Overreliance
+    check_llm10_model_theft,        # LLM10: Model Theft
+    check_general_security_patterns,  # Additional security patterns
+)
 
 # Test function
 if __name__ == "__main__":
@@ -1,31 +1,20 @@
-import os
-import time
 from dotenv import load_dotenv
-from opentelemetry import trace
-from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
-from opentelemetry.sdk.resources import Resource
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor
 
-load_dotenv()
-
-# 初始化
-resource = Resource(attributes={
-    "service.name": "secure-pr-guard",
-    "service.version": "1.0.0",
-    "deployment.environment": "test"
-})
+from tests._otel_helper import bearer_auth_headers, configure_otlp
 
-provider = TracerProvider(resource=resource)
+load_dotenv()
 
-otlp_exporter = OTLPSpanExporter(
-    endpoint=f"{os.getenv('OTLP_ENDPOINT')}/v1/traces",
-    headers=(("Authorization", f"Bearer {os.getenv('OTLP_API_KEY')}"),),
+# 初始化（只有3个span：同步导出，进程退出前即已送达）
+provider = configure_otlp(
+    "secure-pr-guard",
+    resource_attributes={
+        "service.version": "1.0.0",
+        "deployment.environment": "test"
+    },
+    headers=bearer_auth_headers(),
+    batch=False
 )
-
-provider.add_span_processor(BatchSpanProcessor(otlp_exporter))
-trace.set_tracer_provider(provider)
-tracer = trace.get_tracer(__name__)
+tracer = provider.get_tracer(__name__)
 
 print("🧪 Testing Grafana Cloud connection...")
 
@@ -46,7 +35,9 @@ for i in range(3):
         span.set_attribute("cost_usd", cost)
         
         print(f"✅ Sent test span {i+1}: {operation} (latency={latency}ms, tokens={tokens}, cost=${cost})")
-        time.sleep(1)
+
+# 确保所有span在退出前导出（provider 由 configure_otlp 共享，这里不关闭）
+provider.force_flush(10000)
 
 print("\n⏳ Waiting for data to appear in Grafana...")
 print("📊 Go to Grafana Cloud → Explore → Select 'grafanacloud-siwenwang0803-traces'")
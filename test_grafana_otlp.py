@@ -4,17 +4,18 @@ Test Grafana Cloud OTLP connection with proper authentication
 
 import os
 import time
-import base64
 from dotenv import load_dotenv
-from opentelemetry import trace
-from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
-from opentelemetry.sdk.resources import Resource
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+from tests._otel_helper import basic_auth_headers, bearer_auth_headers, configure_otlp
 
 # Load environment variables
 load_dotenv()
 
+# Grafana Cloud connection settings
+_OTLP_ENDPOINT = os.getenv("OTLP_ENDPOINT", "https://otlp-gateway-prod-us-west-0.grafana.net/otlp")
+_OTLP_USER = os.getenv("OTLP_USERNAME", "1251973")  # From your screenshot
+_OTLP_PW = os.getenv("OTLP_API_KEY")
+
 def test_grafana_cloud_otlp():
     """Test OTLP connection to Grafana Cloud"""
     
@@ -22,45 +23,28 @@ def test_grafana_cloud_otlp():
     print("=" * 50)
     
     # Configuration
-    endpoint = os.getenv("OTLP_ENDPOINT", "https://otlp-gateway-prod-us-west-0.grafana.net/otlp")
-    username = os.getenv("OTLP_USERNAME", "1251973")  # From your screenshot
-    api_key = os.getenv("OTLP_API_KEY")
+    endpoint = _OTLP_ENDPOINT
+    username = _OTLP_USER
+    api_key = _OTLP_PW
     
     print(f"OTLP Endpoint: {endpoint}")
     print(f"Username: {username}")
-    print(f"API Key: {api_key[:20]}...{api_key[-10:] if api_key else 'Not set'}")
+    print(f"API Key: {api_key[:20]}...{api_key[-10:]}" if api_key else "API Key: Not set")
     print("=" * 50)
     
-    # Create Basic Auth credentials
-    credentials = base64.b64encode(f"{username}:{api_key}".encode()).decode()
-    
     try:
-        # Create resource
-        resource = Resource.create({
-            "service.name": "secure-pr-guard-test",
-            "service.version": "1.0.0",
-            "deployment.environment": "test"
-        })
-        
-        # Setup tracer
-        provider = TracerProvider(resource=resource)
-        
-        # Create OTLP exporter with Basic Auth
-        otlp_exporter = OTLPSpanExporter(
-            endpoint=f"{endpoint}/v1/traces",
-            headers={
-                "Authorization": f"Basic {credentials}",
-                "X-Scope-OrgID": username,  # Sometimes required by Grafana
-            }
+        # Basic auth exporter plus console echo; this provider becomes global
+        provider = configure_otlp(
+            "secure-pr-guard-test",
+            resource_attributes={
+                "service.version": "1.0.0",
+                "deployment.environment": "test"
+            },
+            headers=basic_auth_headers(username),  # X-Scope-OrgID sometimes required by Grafana
+            endpoint=endpoint,
+            console=True
         )
-        
-        # Add span processors
-        provider.add_span_processor(BatchSpanProcessor(otlp_exporter))
-        provider.add_span_processor(BatchSpanProcessor(ConsoleSpanExporter()))
-        
-        # Set tracer provider
-        trace.set_tracer_provider(provider)
-        tracer = trace.get_tracer(__name__)
+        tracer = provider.get_tracer(__name__)
         
         # Create test spans
         print("\n📤 Sending test traces...")
@@ -82,7 +66,14 @@ def test_grafana_cloud_otlp():
         
         # Force flush to ensure export
         print("⏳ Flushing spans...")
-        provider.force_flush()
+        flushed = provider.force_flush(timeout_millis=10000)
+        
+        if not api_key:
+            print("⚠️ OTLP_API_KEY not set - spans kept in memory, nothing was sent")
+            return
+        if not flushed:
+            print("❌ Traces were not exported before the flush timed out")
+            return
         
         print("✅ Traces sent successfully!")
         print("\n📊 Check your Grafana Cloud:")
@@ -105,30 +96,29 @@ def test_alternative_auth():
     print("=" * 50)
     
     endpoint = os.getenv("OTLP_ENDPOINT")
-    api_key = os.getenv("OTLP_API_KEY")
     
     # Test direct API key as password
     try:
-        resource = Resource.create({"service.name": "auth-test-direct"})
-        provider = TracerProvider(resource=resource)
-        
-        # Use API key directly as Bearer token
-        otlp_exporter = OTLPSpanExporter(
-            endpoint=f"{endpoint}/v1/traces",
-            headers={
-                "Authorization": f"Bearer {api_key}",
-            }
+        # Use API key directly as Bearer token. The global provider is
+        # already owned by the Basic auth test, so take the tracer straight
+        # from this provider
+        provider = configure_otlp(
+            "auth-test-direct",
+            headers=bearer_auth_headers(),
+            endpoint=endpoint
         )
-        
-        provider.add_span_processor(BatchSpanProcessor(otlp_exporter))
-        trace.set_tracer_provider(provider)
-        tracer = trace.get_tracer(__name__)
+        tracer = provider.get_tracer(__name__)
         
         with tracer.start_as_current_span("auth_test_bearer"):
             pass
             
-        provider.force_flush()
-        print("✅ Bearer token auth test completed")
+        flushed = provider.force_flush(timeout_millis=10000)
+        if not _OTLP_PW:
+            print("⚠️ Bearer token auth skipped - OTLP_API_KEY not set, nothing was sent")
+        elif not flushed:
+            print("❌ Bearer token auth test timed out before the export finished")
+        else:
+            print("✅ Bearer token auth test completed")
         
     except Exception as e:
         print(f"❌ Bearer token auth failed: {str(e)}")
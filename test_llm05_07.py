@@ -4,11 +4,23 @@ Test script for LLM05-07 security rules
 Run: python test_llm05_07.py
 """
 
-from security_checks import run_llm_security_rules
+import sys
+from collections import defaultdict
+from functools import lru_cache
+
+from security_checks import run_llm_security_rules, run_llm_security_rules_batch
+
+# Categories reported separately in the combined scenario
+LLM05_07 = frozenset(("LLM05", "LLM06", "LLM07"))
+
+@lru_cache(maxsize=128)
+def _cached_rules(diff: str) -> tuple:
+    """Scan each distinct diff once; a tuple keeps the cached result immutable"""
+    return tuple(run_llm_security_rules(diff))
 
 def test_llm05_authz_bypass():
     """Test LLM05: Authorization Bypass Detection"""
-    print("🔍 Testing LLM05: Authorization Bypass")
+    lines = ["🔍 Testing LLM05: Authorization Bypass"]
     
     test_cases = [
         # Should trigger LLM05 alerts
@@ -28,24 +40,25 @@ def test_llm05_authz_bypass():
     ]
     
     total_issues = 0
-    for test_case in test_cases:
-        issues = run_llm_security_rules(test_case)
-        llm05_issues = [i for i in issues if "LLM05" in i['comment']]
+    results = run_llm_security_rules_batch(test_cases)
+    for test_case, issues in zip(test_cases, results):
+        llm05_issues = [i for i in issues if i.get('category') == "LLM05"]
         
         if llm05_issues:
-            print(f"   ✅ DETECTED: {test_case.strip()}")
-            for issue in llm05_issues:
-                print(f"      └─ {issue['comment']}")
+            lines.append(f"   ✅ DETECTED: {test_case.strip()}")
+            lines.extend(f"      └─ {issue['comment']}" for issue in llm05_issues)
             total_issues += len(llm05_issues)
         else:
-            print(f"   ⚪ CLEAN: {test_case.strip()}")
+            lines.append(f"   ⚪ CLEAN: {test_case.strip()}")
     
-    print(f"   📊 LLM05 Total Issues Found: {total_issues}\n")
+    lines.append(f"   📊 LLM05 Total Issues Found: {total_issues}\n")
+    # One write per test instead of a print() per line
+    sys.stdout.write("\n".join(lines) + "\n")
     return total_issues
 
 def test_llm06_data_exfil():
     """Test LLM06: Data Exfiltration Detection"""
-    print("🔍 Testing LLM06: Data Exfiltration")
+    lines = ["🔍 Testing LLM06: Data Exfiltration"]
     
     test_cases = [
         # Should trigger LLM06 alerts
@@ -66,24 +79,25 @@ def test_llm06_data_exfil():
     ]
     
     total_issues = 0
-    for test_case in test_cases:
-        issues = run_llm_security_rules(test_case)
-        llm06_issues = [i for i in issues if "LLM06" in i['comment']]
+    results = run_llm_security_rules_batch(test_cases)
+    for test_case, issues in zip(test_cases, results):
+        llm06_issues = [i for i in issues if i.get('category') == "LLM06"]
         
         if llm06_issues:
-            print(f"   ✅ DETECTED: {test_case.strip()}")
-            for issue in llm06_issues:
-                print(f"      └─ {issue['comment']}")
+            lines.append(f"   ✅ DETECTED: {test_case.strip()}")
+            lines.extend(f"      └─ {issue['comment']}" for issue in llm06_issues)
             total_issues += len(llm06_issues)
         else:
-            print(f"   ⚪ CLEAN: {test_case.strip()}")
+            lines.append(f"   ⚪ CLEAN: {test_case.strip()}")
     
-    print(f"   📊 LLM06 Total Issues Found: {total_issues}\n")
+    lines.append(f"   📊 LLM06 Total Issues Found: {total_issues}\n")
+    # One write per test instead of a print() per line
+    sys.stdout.write("\n".join(lines) + "\n")
     return total_issues
 
 def test_llm07_plugin_dos():
     """Test LLM07: Plugin DoS Detection"""
-    print("🔍 Testing LLM07: Plugin DoS")
+    lines = ["🔍 Testing LLM07: Plugin DoS"]
     
     test_cases = [
         # Should trigger LLM07 alerts
@@ -106,19 +120,20 @@ def test_llm07_plugin_dos():
     ]
     
     total_issues = 0
-    for test_case in test_cases:
-        issues = run_llm_security_rules(test_case)
-        llm07_issues = [i for i in issues if "LLM07" in i['comment']]
+    results = run_llm_security_rules_batch(test_cases)
+    for test_case, issues in zip(test_cases, results):
+        llm07_issues = [i for i in issues if i.get('category') == "LLM07"]
         
         if llm07_issues:
-            print(f"   ✅ DETECTED: {test_case.strip()}")
-            for issue in llm07_issues:
-                print(f"      └─ {issue['comment']}")
+            lines.append(f"   ✅ DETECTED: {test_case.strip()}")
+            lines.extend(f"      └─ {issue['comment']}" for issue in llm07_issues)
             total_issues += len(llm07_issues)
         else:
-            print(f"   ⚪ CLEAN: {test_case.strip()}")
+            lines.append(f"   ⚪ CLEAN: {test_case.strip()}")
     
-    print(f"   📊 LLM07 Total Issues Found: {total_issues}\n")
+    lines.append(f"   📊 LLM07 Total Issues Found: {total_issues}\n")
+    # One write per test instead of a print() per line
+    sys.stdout.write("\n".join(lines) + "\n")
     return total_issues
 
 def test_combined_scenario():
@@ -150,19 +165,13 @@ def test_combined_scenario():
 +     return "compromised"
 """
     
-    issues = run_llm_security_rules(realistic_diff)
+    issues = _cached_rules(realistic_diff)
     
     # Categorize issues by LLM type
-    categories = {}
+    categories = defaultdict(list)
     for issue in issues:
-        if "LLM05" in issue['comment']:
-            categories.setdefault("LLM05", []).append(issue)
-        elif "LLM06" in issue['comment']:
-            categories.setdefault("LLM06", []).append(issue)
-        elif "LLM07" in issue['comment']:
-            categories.setdefault("LLM07", []).append(issue)
-        else:
-            categories.setdefault("Other", []).append(issue)
+        category = issue['category']
+        categories[category if category in LLM05_07 else "Other"].append(issue)
     
     print(f"   📊 Combined Scenario Results:")
     for category, issues_list in categories.items():
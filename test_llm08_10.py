@@ -4,11 +4,35 @@ Test script for LLM08-10 security rules - Final OWASP LLM Top 10 completion
 Run: python test_llm08_10.py
 """
 
-from security_checks import run_llm_security_rules
+import io
+import sys
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+
+from security_checks import run_llm_security_rules, scan_issues
+
+# "LLM01".."LLM10", formatted once at import
+LLM_KEYS = tuple(f"LLM{llm_num:02d}" for llm_num in range(1, 11))
+_LLM_KEY_SET = frozenset(LLM_KEYS)
+
+def _scan_cases(test_cases, category):
+    """
+    Scan single-line test cases in one pass and return, per case, the
+    comments of its issues in the given category (case i is diff line i + 1)
+    """
+    issues = scan_issues("\n".join(test_cases))
+    comments_by_line = defaultdict(list)
+    # The category check is not redundant: some LLM09 cases also trip LLM02
+    # rules. It runs inside the single bucketing pass, not per case.
+    for line_num, issue_category, comment in zip(issues.lines, issues.categories, issues.comments):
+        if issue_category == category:
+            comments_by_line[line_num].append(comment)
+    return [comments_by_line[line_num] for line_num in range(1, len(test_cases) + 1)]
 
 def test_llm08_excessive_agency():
     """Test LLM08: Excessive Agency Detection"""
-    print("🔍 Testing LLM08: Excessive Agency")
+    lines = ["🔍 Testing LLM08: Excessive Agency"]
     
     test_cases = [
         # Should trigger LLM08 alerts
@@ -30,24 +54,22 @@ def test_llm08_excessive_agency():
     ]
     
     total_issues = 0
-    for test_case in test_cases:
-        issues = run_llm_security_rules(test_case)
-        llm08_issues = [i for i in issues if "LLM08" in i['comment']]
-        
-        if llm08_issues:
-            print(f"   ✅ DETECTED: {test_case.strip()}")
-            for issue in llm08_issues:
-                print(f"      └─ {issue['comment']}")
-            total_issues += len(llm08_issues)
+    for test_case, llm08_comments in zip(test_cases, _scan_cases(test_cases, "LLM08")):
+        if llm08_comments:
+            lines.append(f"   ✅ DETECTED: {test_case.strip()}")
+            lines.extend(f"      └─ {comment}" for comment in llm08_comments)
+            total_issues += len(llm08_comments)
         else:
-            print(f"   ⚪ CLEAN: {test_case.strip()}")
+            lines.append(f"   ⚪ CLEAN: {test_case.strip()}")
     
-    print(f"   📊 LLM08 Total Issues Found: {total_issues}\n")
+    lines.append(f"   📊 LLM08 Total Issues Found: {total_issues}\n")
+    # One write per test instead of a print() per line
+    sys.stdout.write("\n".join(lines) + "\n")
     return total_issues
 
 def test_llm09_overreliance():
     """Test LLM09: Overreliance Detection"""
-    print("🔍 Testing LLM09: Overreliance")
+    lines = ["🔍 Testing LLM09: Overreliance"]
     
     test_cases = [
         # Should trigger LLM09 alerts
@@ -70,24 +92,22 @@ def test_llm09_overreliance():
     ]
     
     total_issues = 0
-    for test_case in test_cases:
-        issues = run_llm_security_rules(test_case)
-        llm09_issues = [i for i in issues if "LLM09" in i['comment']]
-        
-        if llm09_issues:
-            print(f"   ✅ DETECTED: {test_case.strip()}")
-            for issue in llm09_issues:
-                print(f"      └─ {issue['comment']}")
-            total_issues += len(llm09_issues)
+    for test_case, llm09_comments in zip(test_cases, _scan_cases(test_cases, "LLM09")):
+        if llm09_comments:
+            lines.append(f"   ✅ DETECTED: {test_case.strip()}")
+            lines.extend(f"      └─ {comment}" for comment in llm09_comments)
+            total_issues += len(llm09_comments)
         else:
-            print(f"   ⚪ CLEAN: {test_case.strip()}")
+            lines.append(f"   ⚪ CLEAN: {test_case.strip()}")
     
-    print(f"   📊 LLM09 Total Issues Found: {total_issues}\n")
+    lines.append(f"   📊 LLM09 Total Issues Found: {total_issues}\n")
+    # One write per test instead of a print() per line
+    sys.stdout.write("\n".join(lines) + "\n")
     return total_issues
 
 def test_llm10_model_theft():
     """Test LLM10: Model Theft Detection"""
-    print("🔍 Testing LLM10: Model Theft")
+    lines = ["🔍 Testing LLM10: Model Theft"]
     
     test_cases = [
         # Should trigger LLM10 alerts
@@ -110,24 +130,22 @@ def test_llm10_model_theft():
     ]
     
     total_issues = 0
-    for test_case in test_cases:
-        issues = run_llm_security_rules(test_case)
-        llm10_issues = [i for i in issues if "LLM10" in i['comment']]
-        
-        if llm10_issues:
-            print(f"   ✅ DETECTED: {test_case.strip()}")
-            for issue in llm10_issues:
-                print(f"      └─ {issue['comment']}")
-            total_issues += len(llm10_issues)
+    for test_case, llm10_comments in zip(test_cases, _scan_cases(test_cases, "LLM10")):
+        if llm10_comments:
+            lines.append(f"   ✅ DETECTED: {test_case.strip()}")
+            lines.extend(f"      └─ {comment}" for comment in llm10_comments)
+            total_issues += len(llm10_comments)
         else:
-            print(f"   ⚪ CLEAN: {test_case.strip()}")
+            lines.append(f"   ⚪ CLEAN: {test_case.strip()}")
     
-    print(f"   📊 LLM10 Total Issues Found: {total_issues}\n")
+    lines.append(f"   📊 LLM10 Total Issues Found: {total_issues}\n")
+    # One write per test instead of a print() per line
+    sys.stdout.write("\n".join(lines) + "\n")
     return total_issues
 
 def test_complete_owasp_scenario():
     """Test a comprehensive scenario covering all 10 OWASP LLM rules"""
-    print("🔍 Testing Complete OWASP LLM Top 10 Scenario")
+    lines = ["🔍 Testing Complete OWASP LLM Top 10 Scenario"]
     
     comprehensive_diff = """
 + import requests
@@ -176,49 +194,74 @@ def test_complete_owasp_scenario():
     
     issues = run_llm_security_rules(comprehensive_diff)
     
-    # Categorize issues by LLM type
-    categories = {}
+    # Categorize issues by LLM type; anything else is a general finding
+    categories = defaultdict(list)
     for issue in issues:
-        for llm_num in range(1, 11):
-            llm_key = f"LLM{llm_num:02d}"
-            if llm_key in issue['comment']:
-                categories.setdefault(llm_key, []).append(issue)
-                break
-        else:
-            categories.setdefault("General", []).append(issue)
+        category = issue['category']
+        categories[category if category in _LLM_KEY_SET else "General"].append(issue)
     
-    print(f"   📊 Complete OWASP Coverage Results:")
-    for llm_num in range(1, 11):
-        llm_key = f"LLM{llm_num:02d}"
-        count = len(categories.get(llm_key, []))
+    lines.append(f"   📊 Complete OWASP Coverage Results:")
+    for llm_key in LLM_KEYS:
+        llm_issues = categories.get(llm_key, ())
+        count = len(llm_issues)
         status = "✅" if count > 0 else "❌"
-        print(f"      {status} {llm_key}: {count} issues detected")
+        lines.append(f"      {status} {llm_key}: {count} issues detected")
         
-        # Show sample issues
-        for issue in categories.get(llm_key, [])[:1]:
-            print(f"         └─ Line {issue['line']}: {issue['comment'][:60]}...")
+        # Show sample issue
+        if llm_issues:
+            issue = llm_issues[0]
+            lines.append(f"         └─ Line {issue['line']}: {issue['comment'][:60]}...")
     
     if categories.get("General"):
-        print(f"      ✅ General: {len(categories['General'])} issues")
+        lines.append(f"      ✅ General: {len(categories['General'])} issues")
     
-    print(f"   📊 Total Issues: {len(issues)}")
+    lines.append(f"   📊 Total Issues: {len(issues)}")
     
     # Calculate coverage
-    covered_rules = sum(1 for i in range(1, 11) if len(categories.get(f"LLM{i:02d}", [])) > 0)
+    covered_rules = sum(1 for llm_key in LLM_KEYS if categories.get(llm_key))
     coverage_percentage = (covered_rules / 10) * 100
-    print(f"   🎯 OWASP LLM Coverage: {covered_rules}/10 ({coverage_percentage:.0f}%)\n")
+    lines.append(f"   🎯 OWASP LLM Coverage: {covered_rules}/10 ({coverage_percentage:.0f}%)\n")
+    
+    sys.stdout.write("\n".join(lines) + "\n")
     
     return len(issues), covered_rules
 
+# Independent category tests, run side by side from main()
+CATEGORY_TESTS = {
+    "llm08": test_llm08_excessive_agency,
+    "llm09": test_llm09_overreliance,
+    "llm10": test_llm10_model_theft,
+}
+
+def _run_category_test(name):
+    """
+    Run one category test in a worker process
+    
+    Returns:
+        Tuple of (issues found, captured report text)
+    """
+    buffer = io.StringIO()
+    with redirect_stdout(buffer):
+        count = CATEGORY_TESTS[name]()
+    return count, buffer.getvalue()
+
+def _warmup():
+    """Run the rule engine once so first-call setup is not billed to LLM08"""
+    run_llm_security_rules("+ warmup line")
+
 def main():
     """Run all LLM08-10 tests and final validation"""
     print("🎯 Testing OWASP LLM Security Rules - FINAL COMPLETION LLM08-10")
     print("=" * 80)
     
-    # Run individual tests
-    llm08_count = test_llm08_excessive_agency()
-    llm09_count = test_llm09_overreliance()
-    llm10_count = test_llm10_model_theft()
+    _warmup()
+    
+    # Run individual tests in parallel; reports are printed in order afterwards
+    with ProcessPoolExecutor(max_workers=len(CATEGORY_TESTS)) as executor:
+        results = list(executor.map(_run_category_test, CATEGORY_TESTS))
+    for _, report in results:
+        sys.stdout.write(report)
+    llm08_count, llm09_count, llm10_count = (count for count, _ in results)
     
     # Run comprehensive test
     total_issues, covered_rules = test_complete_owasp_scenario()
@@ -0,0 +1,146 @@
+"""
+tests/_otel_helper.py
+Shared OTLP setup for the Grafana Cloud telemetry test scripts
+"""
+
+import os
+import base64
+import threading
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+import requests
+from dotenv import load_dotenv
+from opentelemetry import trace
+from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import SpanLimits, TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    ConsoleSpanExporter,
+    SimpleSpanProcessor,
+)
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from requests.adapters import HTTPAdapter
+
+from monitoring.otel_helpers import batch_processor_settings
+
+load_dotenv()
+
+# Test spans carry at most ~15 attributes; capping them keeps export
+# payloads small if a script grows its attribute set
+SPAN_LIMITS = SpanLimits(max_attributes=16, max_events=8)
+
+# One TracerProvider per distinct configuration for the whole process
+_PROVIDERS: Dict[tuple, TracerProvider] = {}
+_PROVIDERS_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _shared_session(header_items: Tuple[Tuple[str, str], ...]) -> requests.Session:
+    """
+    Pooled keep-alive session reused by every exporter with the same headers,
+    so tests run in one process pay for a single TLS handshake. Older
+    exporter releases copy their headers onto the session, hence one
+    session per header set rather than one global session.
+    """
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+    return session
+
+
+@lru_cache(maxsize=None)
+def basic_auth_headers(username: str) -> Dict[str, str]:
+    """Grafana Cloud Basic auth headers, encoded once per username"""
+    credentials = base64.b64encode(
+        f"{username}:{os.getenv('OTLP_API_KEY')}".encode()
+    ).decode()
+    return {
+        "Authorization": f"Basic {credentials}",
+        "X-Scope-OrgID": username,
+    }
+
+
+@lru_cache(maxsize=None)
+def bearer_auth_headers() -> Dict[str, str]:
+    """Headers that send the API key directly as a Bearer token"""
+    return {"Authorization": f"Bearer {os.getenv('OTLP_API_KEY')}"}
+
+
+def configure_otlp(service_name: str,
+                   resource_attributes: Optional[Dict[str, str]] = None,
+                   headers: Optional[Dict[str, str]] = None,
+                   endpoint: Optional[str] = None,
+                   batch: bool = True,
+                   console: bool = False) -> TracerProvider:
+    """
+    Get the TracerProvider for a test service, creating it on first use.
+    Providers are cached per full configuration, so two scripts using the
+    same service name with different auth or processors each get their own
+
+    Args:
+        service_name: Value of the service.name resource attribute
+        resource_attributes: Extra resource attributes
+        headers: Exporter headers (defaults to Basic auth)
+        endpoint: OTLP base URL (defaults to OTLP_ENDPOINT)
+        batch: Use the tuned BatchSpanProcessor rather than SimpleSpanProcessor
+        console: Also echo spans to stdout
+
+    Returns:
+        TracerProvider: Cached provider, also installed as the global one
+        if no SDK provider has been set yet
+    """
+    key = (
+        service_name,
+        tuple(sorted((resource_attributes or {}).items())),
+        tuple(sorted(headers.items())) if headers is not None else None,
+        endpoint,
+        batch,
+        console,
+    )
+    provider = _PROVIDERS.get(key)
+    if provider is not None:
+        return provider
+
+    with _PROVIDERS_LOCK:
+        provider = _PROVIDERS.get(key)
+        if provider is None:
+            provider = _build_provider(
+                service_name, resource_attributes, headers, endpoint, batch, console
+            )
+            _PROVIDERS[key] = provider
+    return provider
+
+
+def _build_provider(service_name, resource_attributes, headers, endpoint, batch, console):
+    """Resource -> TracerProvider -> OTLPSpanExporter -> span processor"""
+    resource = Resource.create({"service.name": service_name, **(resource_attributes or {})})
+    provider = TracerProvider(resource=resource, span_limits=SPAN_LIMITS)
+
+    if not os.getenv("OTLP_API_KEY"):
+        # No credentials: every export would fail and stall the batch
+        # worker on retries, so keep spans in memory instead
+        print("⚠️ OTLP_API_KEY not set - spans kept in memory, nothing exported")
+        provider.add_span_processor(SimpleSpanProcessor(InMemorySpanExporter()))
+    else:
+        if headers is None:
+            headers = basic_auth_headers(os.getenv("OTLP_USERNAME", "1299868"))
+        otlp_exporter = OTLPSpanExporter(
+            endpoint=f"{endpoint or os.getenv('OTLP_ENDPOINT')}/v1/traces",
+            headers=headers,
+            session=_shared_session(tuple(sorted(headers.items())))
+        )
+
+        if batch:
+            provider.add_span_processor(BatchSpanProcessor(otlp_exporter, **batch_processor_settings()))
+        else:
+            provider.add_span_processor(SimpleSpanProcessor(otlp_exporter))
+
+    if console:
+        provider.add_span_processor(BatchSpanProcessor(ConsoleSpanExporter()))
+
+    # Avoid double init when several scripts are imported into one process
+    if not isinstance(trace.get_tracer_provider(), TracerProvider):
+        trace.set_tracer_provider(provider)
+
+    return provider
@@ -0,0 +1,80 @@
+"""
+tests/conftest.py
+test_otel_helpers 共享 fixtures - mock 对象每个测试新建，配置不会跨测试泄漏
+"""
+
+import time
+import types
+
+import pytest
+from unittest.mock import MagicMock
+
+from monitoring.otel_helpers import OTEL_AVAILABLE, OTELConfig, _parse_pr_url
+
+if OTEL_AVAILABLE:
+    from opentelemetry.trace import Span, Tracer
+else:
+    Span = Tracer = None
+
+# otel_helpers 在测试中看到的固定时钟
+FROZEN_TIME = 1_700_000_000.0
+
+
+def pytest_collection_modifyitems(items):
+    """test_otel_helpers 中未标 integration 的测试都标为 unit，-m unit 与 -m integration 互斥"""
+    for item in items:
+        if item.module.__name__.endswith("test_otel_helpers") and not item.get_closest_marker("integration"):
+            item.add_marker(pytest.mark.unit)
+
+
+@pytest.fixture
+def mock_tracer():
+    """tracer mock，按真实 Tracer 接口约束属性（OTEL 不可用时退化为普通 MagicMock）"""
+    return MagicMock(spec=Tracer)
+
+
+@pytest.fixture
+def mock_span():
+    """span mock，按真实 Span 接口约束属性"""
+    return MagicMock(spec=Span)
+
+
+@pytest.fixture(scope="session")
+def otel_config():
+    """完整的基线配置（endpoint + username + api_key）"""
+    return OTELConfig(endpoint="https://test.com", username="test", api_key="key")
+
+
+@pytest.fixture(autouse=True)
+def frozen_time(monkeypatch):
+    """
+    冻结 otel_helpers 模块内的 time.time()，延迟计算结果可精确断言
+    只替换该模块引用的 time，不影响全局 time 模块
+    """
+    monkeypatch.setattr(
+        "monitoring.otel_helpers.time",
+        types.SimpleNamespace(time=lambda: FROZEN_TIME, sleep=time.sleep)
+    )
+    return FROZEN_TIME
+
+
+@pytest.fixture
+def otel_patches(mocker):
+    """
+    一次性 patch OTELManager.initialize 用到的全部 OpenTelemetry 组件
+    测试通过 .resource / .provider / .exporter / .batch / .trace 设置 side_effect 等
+    """
+    return types.SimpleNamespace(
+        available=mocker.patch('monitoring.otel_helpers.OTEL_AVAILABLE', True),
+        resource=mocker.patch('monitoring.otel_helpers.Resource'),
+        provider=mocker.patch('monitoring.otel_helpers.TracerProvider'),
+        exporter=mocker.patch('monitoring.otel_helpers.OTLPSpanExporter'),
+        batch=mocker.patch('monitoring.otel_helpers.BatchSpanProcessor'),
+        trace=mocker.patch('monitoring.otel_helpers.trace'),
+    )
+
+
+@pytest.fixture(autouse=True)
+def clear_pr_url_cache():
+    """每个测试前清空 _parse_pr_url 的 lru_cache，避免缓存跨测试泄漏"""
+    _parse_pr_url.cache_clear()
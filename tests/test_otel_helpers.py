@@ -6,12 +6,7 @@ tests/test_otel_helpers.py
 """
 
 import pytest
-import unittest.mock as mock
-from unittest.mock import patch, MagicMock, call
-import time
-import os
-import tempfile
-from datetime import datetime, timezone
+from unittest.mock import MagicMock
 from contextlib import nullcontext
 
 # 导入被测试的模块
@@ -25,9 +20,28 @@ from monitoring.otel_helpers import (
     instrument_workflow,
     get_global_instrumentor,
     shutdown_otel,
+    batch_processor_settings,
     OTEL_AVAILABLE
 )
 
+# 纯 mock 测试，可用 pytest -n auto 并行
+# unit 标记由 conftest 加给未标 integration 的测试，两个标记不会同时出现
+
+# OTELConfig.from_env 读取的全部环境变量
+OTEL_ENV_KEYS = (
+    'OTEL_SERVICE_NAME', 'OTEL_SERVICE_VERSION', 'ENVIRONMENT', 'OTEL_NAMESPACE',
+    'OTLP_ENDPOINT', 'OTLP_USERNAME', 'OTLP_API_KEY'
+)
+
+# batch_processor_settings 让位给 SDK 的环境变量
+BSP_ENV_KEYS = (
+    'OTEL_BSP_MAX_QUEUE_SIZE', 'OTEL_BSP_SCHEDULE_DELAY',
+    'OTEL_BSP_MAX_EXPORT_BATCH_SIZE', 'OTEL_BSP_EXPORT_TIMEOUT'
+)
+
+# 多个测试共用的 OTELConfig 连接参数
+_BASE_CONFIG_KWARGS = {"endpoint": "http://test.com", "api_key": "key", "username": "test"}
+
 
 class TestOTELConfig:
     """测试 OTEL 配置类"""
@@ -46,33 +60,33 @@ class TestOTELConfig:
     def test_custom_config(self):
         """测试自定义配置"""
         config = OTELConfig(
+            **_BASE_CONFIG_KWARGS,
             service_name="test-service",
             service_version="v1.0",
             environment="test",
-            namespace="test-ns",
-            endpoint="http://test.com",
-            username="testuser",
-            api_key="testkey"
+            namespace="test-ns"
         )
         assert config.service_name == "test-service"
         assert config.service_version == "v1.0"
         assert config.environment == "test"
         assert config.namespace == "test-ns"
         assert config.endpoint == "http://test.com"
-        assert config.username == "testuser"
-        assert config.api_key == "testkey"
-    
-    @patch.dict(os.environ, {
-        'OTEL_SERVICE_NAME': 'env-service',
-        'OTEL_SERVICE_VERSION': 'v2.0',
-        'ENVIRONMENT': 'staging',
-        'OTEL_NAMESPACE': 'env-ns',
-        'OTLP_ENDPOINT': 'http://env.com',
-        'OTLP_USERNAME': 'envuser',
-        'OTLP_API_KEY': 'envkey'
-    })
-    def test_from_env(self):
+        assert config.username == "test"
+        assert config.api_key == "key"
+    
+    def test_from_env(self, monkeypatch):
         """测试从环境变量创建配置"""
+        for key, value in {
+            'OTEL_SERVICE_NAME': 'env-service',
+            'OTEL_SERVICE_VERSION': 'v2.0',
+            'ENVIRONMENT': 'staging',
+            'OTEL_NAMESPACE': 'env-ns',
+            'OTLP_ENDPOINT': 'http://env.com',
+            'OTLP_USERNAME': 'envuser',
+            'OTLP_API_KEY': 'envkey'
+        }.items():
+            monkeypatch.setenv(key, value)
+        
         config = OTELConfig.from_env()
         assert config.service_name == "env-service"
         assert config.service_version == "v2.0"
@@ -82,9 +96,11 @@ class TestOTELConfig:
         assert config.username == "envuser"
         assert config.api_key == "envkey"
     
-    @patch.dict(os.environ, {}, clear=True)
-    def test_from_env_defaults(self):
+    def test_from_env_defaults(self, monkeypatch):
         """测试环境变量默认值"""
+        for key in OTEL_ENV_KEYS:
+            monkeypatch.delenv(key, raising=False)
+        
         config = OTELConfig.from_env()
         assert config.service_name == "secure-pr-guard"
         assert config.service_version == "v2.1"
@@ -93,216 +109,217 @@ class TestOTELConfig:
         assert config.username == "1299868"  # 默认值
 
 
-class TestOTELManager:
-    """测试 OTEL 管理器"""
-    
-    def test_init_default_config(self):
-        """测试默认配置初始化"""
-        manager = OTELManager()
-        assert manager.config is not None
-        assert manager.tracer is None
-        assert manager.span_processor is None
-        assert manager._initialized is False
-    
-    def test_init_custom_config(self):
-        """测试自定义配置初始化"""
-        config = OTELConfig(service_name="test")
-        manager = OTELManager(config)
-        assert manager.config == config
-        assert manager.config.service_name == "test"
-    
-    @patch('monitoring.otel_helpers.OTEL_AVAILABLE', False)
-    def test_initialize_otel_unavailable(self):
-        """测试 OTEL 不可用时的初始化"""
-        manager = OTELManager()
-        result = manager.initialize()
-        assert result is False
-        assert manager._initialized is False
-    
-    def test_initialize_missing_endpoint(self):
-        """测试缺少端点配置"""
-        config = OTELConfig(endpoint=None, api_key="test")
-        manager = OTELManager(config)
-        result = manager.initialize()
-        assert result is False
-        assert manager._initialized is False
-    
-    def test_initialize_missing_api_key(self):
-        """测试缺少API密钥"""
-        config = OTELConfig(endpoint="http://test.com", api_key=None)
-        manager = OTELManager(config)
-        result = manager.initialize()
-        assert result is False
-        assert manager._initialized is False
-    
-    @patch('monitoring.otel_helpers.OTEL_AVAILABLE', True)
-    @patch('monitoring.otel_helpers.Resource')
-    @patch('monitoring.otel_helpers.TracerProvider')
-    @patch('monitoring.otel_helpers.OTLPSpanExporter')
-    @patch('monitoring.otel_helpers.BatchSpanProcessor')
-    @patch('monitoring.otel_helpers.trace')
-    def test_initialize_success(self, mock_trace, mock_batch_processor, 
-                               mock_otlp_exporter, mock_tracer_provider, mock_resource):
-        """测试成功初始化"""
-        # Setup mocks
-        mock_resource.return_value = MagicMock()
-        mock_provider = MagicMock()
-        mock_tracer_provider.return_value = mock_provider
-        mock_exporter = MagicMock()
-        mock_otlp_exporter.return_value = mock_exporter
-        mock_processor = MagicMock()
-        mock_batch_processor.return_value = mock_processor
-        mock_tracer = MagicMock()
-        mock_trace.get_tracer.return_value = mock_tracer
-        
-        config = OTELConfig(
-            endpoint="http://test.com",
-            api_key="testkey",
-            username="testuser"
-        )
-        manager = OTELManager(config)
-        
-        result = manager.initialize()
-        
-        assert result is True
-        assert manager._initialized is True
-        assert manager.tracer == mock_tracer
-        mock_trace.set_tracer_provider.assert_called_once_with(mock_provider)
+# =================== OTEL 管理器 ===================
+def test_otel_manager_init_default_config():
+    """测试默认配置初始化"""
+    manager = OTELManager()
+    assert manager.config is not None
+    assert manager.tracer is None
+    assert manager.span_processor is None
+    assert manager._initialized is False
+
+
+def test_otel_manager_init_custom_config():
+    """测试自定义配置初始化"""
+    config = OTELConfig(service_name="test")
+    manager = OTELManager(config)
+    assert manager.config == config
+    assert manager.config.service_name == "test"
+
+
+def test_otel_manager_initialize_otel_unavailable(mocker):
+    """测试 OTEL 不可用时的初始化"""
+    mocker.patch('monitoring.otel_helpers.OTEL_AVAILABLE', False)
+    manager = OTELManager()
+    result = manager.initialize()
+    assert result is False
+    assert manager._initialized is False
+
+
+def test_otel_manager_initialize_missing_endpoint():
+    """测试缺少端点配置"""
+    config = OTELConfig(endpoint=None, api_key="test")
+    manager = OTELManager(config)
+    result = manager.initialize()
+    assert result is False
+    assert manager._initialized is False
+
+
+def test_otel_manager_initialize_missing_api_key():
+    """测试缺少API密钥"""
+    config = OTELConfig(endpoint="http://test.com", api_key=None)
+    manager = OTELManager(config)
+    result = manager.initialize()
+    assert result is False
+    assert manager._initialized is False
+
+
+@pytest.mark.integration
+def test_otel_manager_initialize_success(otel_patches, mock_tracer, monkeypatch):
+    """测试成功初始化"""
+    for key in BSP_ENV_KEYS:
+        monkeypatch.delenv(key, raising=False)
+    mock_provider = otel_patches.provider.return_value
+    otel_patches.trace.get_tracer.return_value = mock_tracer
+    
+    manager = OTELManager(OTELConfig(**_BASE_CONFIG_KWARGS))
+    
+    result = manager.initialize()
+    
+    assert result is True
+    assert manager._initialized is True
+    assert manager.tracer == mock_tracer
+    otel_patches.trace.set_tracer_provider.assert_called_once_with(mock_provider)
+    
+    # BatchSpanProcessor 必须使用调优参数而不是 SDK 默认值
+    otel_patches.batch.assert_called_once()
+    kwargs = otel_patches.batch.call_args.kwargs
+    assert kwargs["max_queue_size"] >= 4096
+    assert kwargs["max_export_batch_size"] <= 256
+    assert kwargs["schedule_delay_millis"] <= 1000
+    assert kwargs["export_timeout_millis"] <= 10000
+
+
+def test_batch_processor_settings_defer_to_env(monkeypatch):
+    """已设置的 OTEL_BSP_* 交给 SDK 自己解析，非整数写法也不会在这里抛 ValueError"""
+    for key in BSP_ENV_KEYS:
+        monkeypatch.delenv(key, raising=False)
+    monkeypatch.setenv("OTEL_BSP_SCHEDULE_DELAY", "1.5e3")
     
-    def test_get_tracer_not_initialized(self):
-        """测试未初始化时获取tracer"""
-        manager = OTELManager()
-        tracer = manager.get_tracer()
-        assert tracer is None
+    settings = batch_processor_settings()
     
-    def test_get_tracer_initialized(self):
-        """测试已初始化时获取tracer"""
-        manager = OTELManager()
-        mock_tracer = MagicMock()
-        manager.tracer = mock_tracer
-        manager._initialized = True
-        
-        tracer = manager.get_tracer()
-        assert tracer == mock_tracer
+    assert "schedule_delay_millis" not in settings
+    assert settings["max_queue_size"] == 4096
+
+
+def test_otel_manager_get_tracer_not_initialized():
+    """测试未初始化时获取tracer"""
+    manager = OTELManager()
+    tracer = manager.get_tracer()
+    assert tracer is None
+
+
+def test_otel_manager_get_tracer_initialized(mock_tracer):
+    """测试已初始化时获取tracer"""
+    manager = OTELManager()
+    manager.tracer = mock_tracer
+    manager._initialized = True
+    
+    tracer = manager.get_tracer()
+    assert tracer == mock_tracer
+
+
+def test_otel_manager_shutdown_no_processor():
+    """测试没有处理器时的关闭"""
+    manager = OTELManager()
+    # 应该不抛出异常
+    manager.shutdown()
+
+
+def test_otel_manager_shutdown_with_processor():
+    """测试有处理器时的关闭"""
+    manager = OTELManager()
+    mock_processor = MagicMock()
+    manager.span_processor = mock_processor
     
-    def test_shutdown_no_processor(self):
-        """测试没有处理器时的关闭"""
-        manager = OTELManager()
-        # 应该不抛出异常
-        manager.shutdown()
+    manager.shutdown(timeout_ms=1000)
     
-    def test_shutdown_with_processor(self):
-        """测试有处理器时的关闭"""
-        manager = OTELManager()
-        mock_processor = MagicMock()
-        manager.span_processor = mock_processor
-        
-        manager.shutdown(timeout_ms=1000)
-        
-        mock_processor.force_flush.assert_called_once_with(timeout_millis=1000)
+    mock_processor.force_flush.assert_called_once_with(timeout_millis=1000)
 
 
-class TestSpanManager:
-    """测试 Span 管理器"""
-    
-    def test_init_no_pr_url(self):
-        """测试无PR URL初始化"""
-        mock_tracer = MagicMock()
-        span_manager = SpanManager(mock_tracer)
-        assert span_manager.tracer == mock_tracer
-        assert span_manager.pr_metadata == {}
+# =================== Span 管理器 ===================
+def test_span_manager_init_no_pr_url(mock_tracer):
+    """测试无PR URL初始化"""
+    span_manager = SpanManager(mock_tracer)
+    assert span_manager.tracer == mock_tracer
+    assert span_manager.pr_metadata == {}
+
+
+def test_span_manager_init_with_pr_url(mock_tracer):
+    """测试带PR URL初始化"""
+    pr_url = "https://github.com/owner/repo/pull/123"
+    span_manager = SpanManager(mock_tracer, pr_url)
+    
+    assert span_manager.tracer == mock_tracer
+    assert "pr.url" in span_manager.pr_metadata
+    assert span_manager.pr_metadata["pr.url"] == pr_url
+
+
+def test_span_manager_extract_pr_metadata_valid_url(mock_tracer):
+    """测试提取有效PR元数据"""
+    pr_url = "https://github.com/owner/repo/pull/123"
+    span_manager = SpanManager(mock_tracer, pr_url)
+    
+    metadata = span_manager.pr_metadata
+    assert metadata["pr.url"] == pr_url
+    assert metadata["pr.repository"] == "owner/repo"
+    assert metadata["pr.owner"] == "owner"
+    assert metadata["pr.repo"] == "repo"
+    assert metadata["pr.number"] == 123
+
+
+def test_span_manager_create_span_no_tracer():
+    """测试无tracer时创建span"""
+    span_manager = SpanManager(None)
+    span = span_manager.create_span("test-operation")
+    assert isinstance(span, type(nullcontext()))
+
+
+def test_span_manager_create_span_with_tracer(mock_tracer, mock_span):
+    """测试有tracer时创建span"""
+    mock_tracer.start_as_current_span.return_value = mock_span
     
-    def test_init_with_pr_url(self):
-        """测试带PR URL初始化"""
-        mock_tracer = MagicMock()
-        pr_url = "https://github.com/owner/repo/pull/123"
-        span_manager = SpanManager(mock_tracer, pr_url)
-        
-        assert span_manager.tracer == mock_tracer
-        assert "pr.url" in span_manager.pr_metadata
-        assert span_manager.pr_metadata["pr.url"] == pr_url
-    
-    def test_extract_pr_metadata_valid_url(self):
-        """测试提取有效PR元数据"""
-        mock_tracer = MagicMock()
-        pr_url = "https://github.com/owner/repo/pull/123"
-        span_manager = SpanManager(mock_tracer, pr_url)
-        
-        metadata = span_manager.pr_metadata
-        assert metadata["pr.url"] == pr_url
-        assert metadata["pr.repository"] == "owner/repo"
-        assert metadata["pr.owner"] == "owner"
-        assert metadata["pr.repo"] == "repo"
-        assert metadata["pr.number"] == 123
-    
-    def test_create_span_no_tracer(self):
-        """测试无tracer时创建span"""
-        span_manager = SpanManager(None)
-        span = span_manager.create_span("test-operation")
-        assert isinstance(span, type(nullcontext()))
-    
-    def test_create_span_with_tracer(self):
-        """测试有tracer时创建span"""
-        mock_tracer = MagicMock()
-        mock_span = MagicMock()
-        mock_tracer.start_as_current_span.return_value = mock_span
-        
-        span_manager = SpanManager(mock_tracer)
-        span = span_manager.create_span("test-operation", "test-type")
-        
-        assert span == mock_span
-        mock_tracer.start_as_current_span.assert_called_once_with("test-operation")
-        mock_span.set_attributes.assert_called_once()
+    span_manager = SpanManager(mock_tracer)
+    span = span_manager.create_span("test-operation", "test-type")
     
-    def test_set_cost_attributes_complete(self):
-        """测试完整成本属性设置"""
-        mock_tracer = MagicMock()
-        mock_span = MagicMock()
-        span_manager = SpanManager(mock_tracer)
-        
-        cost_info = {
-            "cost_usd": 0.01,
-            "model": "gpt-4o-mini",
-            "prompt_tokens": 100,
-            "completion_tokens": 50,
-            "total_tokens": 150
-        }
-        
-        span_manager.set_cost_attributes(mock_span, cost_info)
-        
-        mock_span.set_attributes.assert_called_once()
-        attributes = mock_span.set_attributes.call_args[0][0]
-        assert attributes["cost.usd"] == 0.01
-        assert attributes["cost.model"] == "gpt-4o-mini"
-        assert attributes["cost.tokens.total"] == 150
-        assert attributes["tokens.prompt_ratio"] == 0.667  # 100/150
-    
-    def test_set_performance_attributes_categories(self):
-        """测试性能类别设置"""
-        mock_tracer = MagicMock()
-        mock_span = MagicMock()
-        span_manager = SpanManager(mock_tracer)
-        
-        # 测试不同延迟类别
-        test_cases = [
-            (500, "fast"),
-            (3000, "normal"),
-            (8000, "slow")
-        ]
-        
-        for latency, expected_category in test_cases:
-            mock_span.reset_mock()
-            span_manager.set_performance_attributes(mock_span, time.time(), latency)
-            attributes = mock_span.set_attributes.call_args[0][0]
-            assert attributes["latency.category"] == expected_category
+    assert span == mock_span
+    mock_tracer.start_as_current_span.assert_called_once_with("test-operation")
+    mock_span.set_attributes.assert_called_once()
+
+
+def test_span_manager_set_cost_attributes_complete(mock_tracer, mock_span):
+    """测试完整成本属性设置"""
+    span_manager = SpanManager(mock_tracer)
+    
+    cost_info = {
+        "cost_usd": 0.01,
+        "model": "gpt-4o-mini",
+        "prompt_tokens": 100,
+        "completion_tokens": 50,
+        "total_tokens": 150
+    }
+    
+    span_manager.set_cost_attributes(mock_span, cost_info)
+    
+    mock_span.set_attributes.assert_called_once()
+    attributes = mock_span.set_attributes.call_args.args[0]
+    assert attributes["cost.usd"] == 0.01
+    assert attributes["cost.model"] == "gpt-4o-mini"
+    assert attributes["cost.tokens.total"] == 150
+    assert attributes["tokens.prompt_ratio"] == 0.667  # 100/150
+
+
+@pytest.mark.parametrize("latency, expected_category", [
+    (500, "fast"),
+    (3000, "normal"),
+    (8000, "slow"),
+])
+def test_span_manager_set_performance_attributes_categories(mock_tracer, mock_span, frozen_time,
+                                                            latency, expected_category):
+    """测试性能类别设置"""
+    span_manager = SpanManager(mock_tracer)
+    
+    span_manager.set_performance_attributes(mock_span, frozen_time, latency)
+    attributes = mock_span.set_attributes.call_args.args[0]
+    assert attributes["latency.category"] == expected_category
 
 
 class TestOTELInstrumentor:
     """测试 OTEL 仪器"""
     
-    @patch('monitoring.otel_helpers.OTELManager')
-    def test_init_no_pr_url(self, mock_otel_manager_class):
+    def test_init_no_pr_url(self, mocker):
         """测试无PR URL初始化"""
+        mock_otel_manager_class = mocker.patch('monitoring.otel_helpers.OTELManager')
         mock_manager = MagicMock()
         mock_manager.initialize.return_value = True
         mock_manager.get_tracer.return_value = MagicMock()
@@ -312,9 +329,9 @@ class TestOTELInstrumentor:
         assert instrumentor.initialized is True
         assert instrumentor.span_manager is not None
     
-    @patch('monitoring.otel_helpers.OTELManager')
-    def test_init_failed_initialization(self, mock_otel_manager_class):
+    def test_init_failed_initialization(self, mocker):
         """测试初始化失败"""
+        mock_otel_manager_class = mocker.patch('monitoring.otel_helpers.OTELManager')
         mock_manager = MagicMock()
         mock_manager.initialize.return_value = False
         mock_otel_manager_class.return_value = mock_manager
@@ -327,23 +344,26 @@ class TestOTELInstrumentor:
 class TestConvenienceFunctions:
     """测试便利函数"""
     
-    @patch('monitoring.otel_helpers.OTELInstrumentor')
-    def test_create_otel_instrumentor(self, mock_instrumentor_class):
+    def test_create_otel_instrumentor(self, mocker):
         """测试创建OTEL仪器"""
         mock_instrumentor = MagicMock()
-        mock_instrumentor_class.return_value = mock_instrumentor
+        mock_instrumentor_class = mocker.patch(
+            'monitoring.otel_helpers.OTELInstrumentor', return_value=mock_instrumentor
+        )
         
         result = create_otel_instrumentor("https://github.com/test/repo/pull/1")
         
         mock_instrumentor_class.assert_called_once_with("https://github.com/test/repo/pull/1")
         assert result == mock_instrumentor
     
-    @patch('monitoring.otel_helpers._global_instrumentor', None)
-    @patch('monitoring.otel_helpers.OTELInstrumentor')
-    def test_get_global_instrumentor_create(self, mock_instrumentor_class):
+    @pytest.mark.xdist_group("global_instrumentor")
+    def test_get_global_instrumentor_create(self, monkeypatch, mocker):
         """测试创建全局仪器"""
+        monkeypatch.setattr('monitoring.otel_helpers._global_instrumentor', None)
         mock_instrumentor = MagicMock()
-        mock_instrumentor_class.return_value = mock_instrumentor
+        mock_instrumentor_class = mocker.patch(
+            'monitoring.otel_helpers.OTELInstrumentor', return_value=mock_instrumentor
+        )
         
         result = get_global_instrumentor()
         
@@ -364,27 +384,24 @@ if __name__ == "__main__":
 class TestMissingCoverage:
     """针对未覆盖代码的测试"""
     
-    def test_span_manager_empty_inputs(self):
+    def test_span_manager_empty_inputs(self, mock_tracer, mock_span, frozen_time):
         """测试空输入处理"""
-        mock_tracer = MagicMock()
         span_manager = SpanManager(mock_tracer)
-        mock_span = MagicMock()
         
         # 测试空参数
         span_manager.set_cost_attributes(None, None)
         span_manager.set_result_attributes(None, None)
-        span_manager.set_performance_attributes(None, time.time())
+        span_manager.set_performance_attributes(None, frozen_time)
         span_manager.set_error_attributes(None, Exception("test"))
     
-    def test_error_handling_paths(self):
+    def test_error_handling_paths(self, mocker):
         """测试错误处理路径"""
         # 测试OTELManager异常处理
-        with patch('monitoring.otel_helpers.Resource') as mock_resource:
-            mock_resource.side_effect = Exception("Test error")
-            config = OTELConfig(endpoint="http://test.com", api_key="key")
-            manager = OTELManager(config)
-            result = manager.initialize()
-            assert result is False
+        mocker.patch('monitoring.otel_helpers.Resource', side_effect=Exception("Test error"))
+        config = OTELConfig(**_BASE_CONFIG_KWARGS)
+        manager = OTELManager(config)
+        result = manager.initialize()
+        assert result is False
     
     def test_shutdown_exception(self):
         """测试关闭异常处理"""
@@ -395,15 +412,14 @@ class TestMissingCoverage:
         
         # 应该不抛出异常
         manager.shutdown()
+        mock_processor.force_flush.assert_called_once()
 
 # =================== 覆盖率提升测试 ===================
 class TestAdvancedCoverage:
     """专门测试未覆盖的代码路径"""
     
-    def test_span_manager_zero_tokens_cost(self):
+    def test_span_manager_zero_tokens_cost(self, mock_tracer, mock_span):
         """测试零tokens情况 - 避免除零错误"""
-        mock_tracer = MagicMock()
-        mock_span = MagicMock()
         span_manager = SpanManager(mock_tracer)
         
         cost_info = {
@@ -418,32 +434,29 @@ class TestAdvancedCoverage:
         
         # 验证没有除零错误，且没有prompt_ratio
         mock_span.set_attributes.assert_called_once()
-        attributes = mock_span.set_attributes.call_args[0][0]
+        attributes = mock_span.set_attributes.call_args.args[0]
         assert "tokens.prompt_ratio" not in attributes
     
-    def test_span_manager_pr_url_edge_cases(self):
+    def test_span_manager_pr_url_edge_cases(self, mock_tracer):
         """测试PR URL边缘情况"""
-        mock_tracer = MagicMock()
         
         # 测试无效PR号码
         span_manager = SpanManager(mock_tracer, "https://github.com/owner/repo/pull/not-a-number")
         assert "pr.url" in span_manager.pr_metadata
         assert "pr.number" not in span_manager.pr_metadata
     
-    def test_span_manager_risk_level_mapping(self):
+    @pytest.mark.parametrize("risk_level, expected_score", [
+        ("low", 1), ("medium", 4), ("high", 7), ("critical", 10), ("unknown", 0)
+    ])
+    def test_span_manager_risk_level_mapping(self, mock_tracer, mock_span,
+                                             risk_level, expected_score):
         """测试所有风险级别映射"""
-        mock_tracer = MagicMock()
-        mock_span = MagicMock()
         span_manager = SpanManager(mock_tracer)
         
-        risk_tests = [("low", 1), ("medium", 4), ("high", 7), ("critical", 10), ("unknown", 0)]
-        
-        for risk_level, expected_score in risk_tests:
-            mock_span.reset_mock()
-            result_info = {"summary": {"risk_level": risk_level}}
-            span_manager.set_result_attributes(mock_span, result_info)
-            attributes = mock_span.set_attributes.call_args[0][0]
-            assert attributes["risk.score"] == expected_score
+        result_info = {"summary": {"risk_level": risk_level}}
+        span_manager.set_result_attributes(mock_span, result_info)
+        attributes = mock_span.set_attributes.call_args.args[0]
+        assert attributes["risk.score"] == expected_score
     
     def test_operation_instrumentor_no_span_manager(self):
         """测试无span_manager的操作仪器"""
@@ -457,64 +470,36 @@ class TestAdvancedCoverage:
         with op_instrumentor as op:
             assert op is not None
             assert op.span is None
-    
-    def test_manager_shutdown_exception(self):
-        """测试关闭异常处理"""
-        manager = OTELManager()
-        mock_processor = MagicMock()
-        mock_processor.force_flush.side_effect = Exception("Flush failed")
-        manager.span_processor = mock_processor
-        
-        # 应该不抛出异常
-        manager.shutdown()
-        mock_processor.force_flush.assert_called_once()
 
 
 # ================= 精确覆盖率测试 (95%+) =================
 class TestPrecisionCoverage:
     """精确覆盖异常路径和边缘情况"""
     
-    def test_otlp_exporter_failure(self):
+    @pytest.mark.integration
+    def test_otlp_exporter_failure(self, otel_patches, otel_config):
         """覆盖 OTLPSpanExporter 失败路径 (248-249, 283)"""
-        with patch('monitoring.otel_helpers.OTEL_AVAILABLE', True), \
-             patch('monitoring.otel_helpers.Resource') as mock_resource, \
-             patch('monitoring.otel_helpers.TracerProvider') as mock_provider_class, \
-             patch('monitoring.otel_helpers.OTLPSpanExporter') as mock_exporter_class:
-            
-            mock_resource.return_value = MagicMock()
-            mock_provider_class.return_value = MagicMock()
-            
-            # 关键：让 OTLPSpanExporter 抛出异常
-            mock_exporter_class.side_effect = Exception("OTLP connection failed")
-            
-            config = OTELConfig(endpoint="https://tempo.grafana.net", username="test", api_key="key")
-            manager = OTELManager(config)
-            result = manager.initialize()
-            
-            assert result is False
-            mock_exporter_class.assert_called_once()
-    
-    def test_batch_processor_failure(self):
+        # 关键：让 OTLPSpanExporter 抛出异常
+        otel_patches.exporter.side_effect = Exception("OTLP connection failed")
+        
+        manager = OTELManager(otel_config)
+        result = manager.initialize()
+        
+        assert result is False
+        otel_patches.exporter.assert_called_once()
+    
+    @pytest.mark.integration
+    def test_batch_processor_failure(self, otel_patches, otel_config):
         """覆盖 BatchSpanProcessor 失败路径"""
-        with patch('monitoring.otel_helpers.OTEL_AVAILABLE', True), \
-             patch('monitoring.otel_helpers.Resource'), \
-             patch('monitoring.otel_helpers.TracerProvider'), \
-             patch('monitoring.otel_helpers.OTLPSpanExporter') as mock_exporter_class, \
-             patch('monitoring.otel_helpers.BatchSpanProcessor') as mock_processor_class:
-            
-            mock_exporter_class.return_value = MagicMock()
-            mock_processor_class.side_effect = Exception("Processor creation failed")
-            
-            config = OTELConfig(endpoint="https://test.com", username="test", api_key="key")
-            manager = OTELManager(config)
-            result = manager.initialize()
-            
-            assert result is False
-    
-    def test_span_attributes_complex_paths(self):
+        otel_patches.batch.side_effect = Exception("Processor creation failed")
+        
+        manager = OTELManager(otel_config)
+        result = manager.initialize()
+        
+        assert result is False
+    
+    def test_span_attributes_complex_paths(self, mock_tracer, mock_span):
         """覆盖 261-270: 复杂span属性路径"""
-        mock_tracer = MagicMock()
-        mock_span = MagicMock()
         mock_tracer.start_as_current_span.return_value = mock_span
         
         span_manager = SpanManager(mock_tracer, "https://github.com/org/repo/pull/123")
@@ -522,98 +507,74 @@ class TestPrecisionCoverage:
         
         # 验证所有属性都被设置
         mock_span.set_attributes.assert_called_once()
-        attrs = mock_span.set_attributes.call_args[0][0]
+        attrs = mock_span.set_attributes.call_args.args[0]
         assert attrs["operation.name"] == "complex.op"
         assert attrs["operation.type"] == "complex-type"
         assert "workflow.start_time" in attrs
     
-    def test_performance_calculated_latency(self):
+    def test_performance_calculated_latency(self, mock_tracer, mock_span, frozen_time):
         """覆盖性能属性计算路径"""
-        mock_tracer = MagicMock()
-        mock_span = MagicMock()
         span_manager = SpanManager(mock_tracer)
         
-        start_time = time.time() - 1.5
+        start_time = frozen_time - 1.5
         span_manager.set_performance_attributes(mock_span, start_time, None)
         
-        attrs = mock_span.set_attributes.call_args[0][0]
-        assert "latency.calculated_ms" in attrs
+        attrs = mock_span.set_attributes.call_args.args[0]
+        assert attrs["latency.calculated_ms"] == 1500
         assert attrs["latency.ms"] == attrs["latency.calculated_ms"]
     
-    def test_main_block_simulation(self):
+    @pytest.mark.integration
+    def test_main_block_simulation(self, mocker):
         """覆盖 372-393: 主函数块"""
-        with patch('monitoring.otel_helpers.create_otel_instrumentor') as mock_create, \
-             patch('time.sleep'):
-            
-            mock_instrumentor = MagicMock()
-            mock_op = MagicMock()
-            mock_op.__enter__ = MagicMock(return_value=mock_op)
-            mock_op.__exit__ = MagicMock()
-            mock_instrumentor.instrument_operation.return_value = mock_op
-            mock_create.return_value = mock_instrumentor
-            
-            # 模拟主函数逻辑
-            instrumentor = mock_create("https://github.com/test/repo/pull/123")
-            with instrumentor.instrument_operation("test.operation", "test") as op:
-                op.set_cost_info({"cost_usd": 0.001234})
-                op.set_result_info({"issues": []})
-            instrumentor.shutdown()
-            
-            mock_create.assert_called_once()
-            mock_instrumentor.shutdown.assert_called_once()
+        mock_create = mocker.patch('monitoring.otel_helpers.create_otel_instrumentor')
+        mocker.patch('time.sleep')
+        
+        mock_instrumentor = MagicMock()
+        mock_op = MagicMock()
+        mock_op.__enter__ = MagicMock(return_value=mock_op)
+        mock_op.__exit__ = MagicMock()
+        mock_instrumentor.instrument_operation.return_value = mock_op
+        mock_create.return_value = mock_instrumentor
+        
+        # 模拟主函数逻辑
+        instrumentor = mock_create("https://github.com/test/repo/pull/123")
+        with instrumentor.instrument_operation("test.operation", "test") as op:
+            op.set_cost_info({"cost_usd": 0.001234})
+            op.set_result_info({"issues": []})
+        instrumentor.shutdown()
+        
+        mock_create.assert_called_once()
+        mock_instrumentor.shutdown.assert_called_once()
 
 
 # ================= 简单有效的覆盖率提升 =================
 class TestSimpleEffectiveCoverage:
     """简单但有效的覆盖率测试"""
     
-    def test_otel_config_defaults_simple(self):
+    def test_otel_config_defaults_simple(self, monkeypatch):
         """测试配置默认值"""
-        import os
-        
         # 简单测试环境变量默认值
-        original_env = os.environ.get('OTEL_SERVICE_NAME')
-        if 'OTEL_SERVICE_NAME' in os.environ:
-            del os.environ['OTEL_SERVICE_NAME']
-        
-        try:
-            config = OTELConfig.from_env()
-            assert config.service_name == "secure-pr-guard"
-        finally:
-            if original_env:
-                os.environ['OTEL_SERVICE_NAME'] = original_env
-    
-    def test_otel_manager_success_path_simple(self):
+        monkeypatch.delenv('OTEL_SERVICE_NAME', raising=False)
+        
+        config = OTELConfig.from_env()
+        assert config.service_name == "secure-pr-guard"
+    
+    @pytest.mark.integration
+    def test_otel_manager_success_path_simple(self, otel_patches, otel_config, capsys, mocker):
         """测试成功路径的print语句"""
-        with patch('monitoring.otel_helpers.OTEL_AVAILABLE', True), \
-             patch('monitoring.otel_helpers.Resource'), \
-             patch('monitoring.otel_helpers.TracerProvider'), \
-             patch('monitoring.otel_helpers.OTLPSpanExporter'), \
-             patch('monitoring.otel_helpers.BatchSpanProcessor'), \
-             patch('monitoring.otel_helpers.trace'), \
-             patch('monitoring.otel_helpers.base64.b64encode') as mock_b64:
-            
-            # 简单的mock设置
-            mock_b64.return_value.decode.return_value = "credentials"
-            
-            config = OTELConfig(endpoint="https://test.com", username="test", api_key="key")
-            manager = OTELManager(config)
-            
-            # 捕获print输出
-            import io, sys
-            captured = io.StringIO()
-            sys.stdout = captured
-            
-            try:
-                manager.initialize()
-                output = captured.getvalue()
-                # 这应该覆盖成功路径的print语句
-            finally:
-                sys.stdout = sys.__stdout__
-    
-    def test_span_manager_pr_url_simple(self):
+        mock_b64 = mocker.patch('monitoring.otel_helpers.base64.b64encode')
+        
+        # 简单的mock设置
+        mock_b64.return_value.decode.return_value = "credentials"
+        
+        manager = OTELManager(otel_config)
+        manager.initialize()
+        
+        # 这应该覆盖成功路径的print语句
+        assert "Observability: Connected" in capsys.readouterr().out
+    
+    def test_span_manager_pr_url_simple(self, mock_tracer):
         """简单的PR URL测试"""
-        mock_tracer = MagicMock()
         
         # 测试有效的PR URL
         span_manager = SpanManager(mock_tracer, "https://github.com/owner/repo/pull/123")
@@ -625,16 +586,14 @@ class TestSimpleEffectiveCoverage:
         assert "pr.url" in span_manager2.pr_metadata
         # pr.number 可能不存在，这是正常的
     
-    def test_span_manager_attributes_simple(self):
+    def test_span_manager_attributes_simple(self, mock_tracer, mock_span, frozen_time):
         """简单的属性测试"""
-        mock_tracer = MagicMock()
-        mock_span = MagicMock()
         span_manager = SpanManager(mock_tracer)
         
         # 测试None处理（这些应该安全返回）
         span_manager.set_cost_attributes(None, {"cost": 0.01})
         span_manager.set_result_attributes(None, {"issues": []})
-        span_manager.set_performance_attributes(None, time.time())
+        span_manager.set_performance_attributes(None, frozen_time)
         span_manager.set_error_attributes(None, Exception("test"), "context")
         
         # 测试正常调用
@@ -646,7 +605,7 @@ class TestSimpleEffectiveCoverage:
         
         # 验证调用
         if mock_span.set_attributes.called:
-            attrs = mock_span.set_attributes.call_args[0][0]
+            attrs = mock_span.set_attributes.call_args.args[0]
             assert "cost.usd" in attrs
     
     def test_operation_instrumentor_simple(self):
@@ -662,60 +621,46 @@ class TestSimpleEffectiveCoverage:
         # 应该安全完成
         assert operation is not None
     
-    def test_main_simulation_simple(self):
+    @pytest.mark.integration
+    def test_main_simulation_simple(self, mocker):
         """简单的主函数模拟"""
-        with patch('monitoring.otel_helpers.create_otel_instrumentor') as mock_create, \
-             patch('time.sleep'):
-            
-            mock_instrumentor = MagicMock()
-            mock_op = MagicMock()
-            mock_op.__enter__ = MagicMock(return_value=mock_op)
-            mock_op.__exit__ = MagicMock()
-            mock_instrumentor.instrument_operation.return_value = mock_op
-            mock_create.return_value = mock_instrumentor
-            
-            # 模拟主函数核心逻辑
-            instrumentor = mock_create("https://github.com/test/repo/pull/123")
-            with instrumentor.instrument_operation("test.operation", "test") as op:
-                op.set_cost_info({"cost_usd": 0.001234})
-            instrumentor.shutdown()
-            
-            # 验证调用
-            mock_create.assert_called_once()
-            mock_instrumentor.shutdown.assert_called_once()
-    
-    def test_print_paths_coverage(self):
+        mock_create = mocker.patch('monitoring.otel_helpers.create_otel_instrumentor')
+        mocker.patch('time.sleep')
+        
+        mock_instrumentor = MagicMock()
+        mock_op = MagicMock()
+        mock_op.__enter__ = MagicMock(return_value=mock_op)
+        mock_op.__exit__ = MagicMock()
+        mock_instrumentor.instrument_operation.return_value = mock_op
+        mock_create.return_value = mock_instrumentor
+        
+        # 模拟主函数核心逻辑
+        instrumentor = mock_create("https://github.com/test/repo/pull/123")
+        with instrumentor.instrument_operation("test.operation", "test") as op:
+            op.set_cost_info({"cost_usd": 0.001234})
+        instrumentor.shutdown()
+        
+        # 验证调用
+        mock_create.assert_called_once()
+        mock_instrumentor.shutdown.assert_called_once()
+        
+    def test_print_paths_coverage(self, capsys, mocker):
         """覆盖print语句路径"""
         # 测试OTEL不可用的print
-        with patch('monitoring.otel_helpers.OTEL_AVAILABLE', False):
-            import io, sys
-            captured = io.StringIO()
-            sys.stdout = captured
-            
-            try:
-                manager = OTELManager()
-                manager.initialize()
-            finally:
-                sys.stdout = sys.__stdout__
-        
-        # 测试配置缺失的print
+        mocker.patch('monitoring.otel_helpers.OTEL_AVAILABLE', False)
+        manager = OTELManager()
+        manager.initialize()
+        assert "OpenTelemetry not available" in capsys.readouterr().out
+        
+        # 测试配置缺失的print（OTEL 可用才会走到配置检查）
+        mocker.patch('monitoring.otel_helpers.OTEL_AVAILABLE', True)
         config = OTELConfig(endpoint=None, api_key=None)
         manager = OTELManager(config)
-        
-        captured = io.StringIO()
-        sys.stdout = captured
-        try:
-            manager.initialize()
-        finally:
-            sys.stdout = sys.__stdout__
+        manager.initialize()
+        assert "not configured" in capsys.readouterr().out
         
         # 测试shutdown成功的print
         manager_with_processor = OTELManager()
         manager_with_processor.span_processor = MagicMock()
-        
-        captured = io.StringIO()
-        sys.stdout = captured
-        try:
-            manager_with_processor.shutdown()
-        finally:
-            sys.stdout = sys.__stdout__
+        manager_with_processor.shutdown()
+        assert "flushed successfully" in capsys.readouterr().out
@@ -4,158 +4,357 @@ Verify Cost Attributes in Grafana Cloud
 """
 
 import os
-import time
+import sys
+import base64
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
+from functools import lru_cache
 from dotenv import load_dotenv
 
-# OpenTelemetry setup
-from opentelemetry import trace
-from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
-from opentelemetry.sdk.resources import Resource
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor
+# OpenTelemetry and requests are imported when telemetry is set up, so
+# `--help` prints the instructions without paying for the SDK import
 
 load_dotenv()
 
-def setup_telemetry():
-    """Setup OpenTelemetry"""
-    resource = Resource(attributes={
-        "service.name": "secure-pr-guard",
-        "service.version": "v2.0-verify",
-        "deployment.environment": "test"
-    })
-    
-    provider = TracerProvider(resource=resource)
-    
-    # Grafana Cloud Basic Auth
-    import base64
-    username = os.getenv("OTLP_USERNAME", "1299868")
-    password = os.getenv("OTLP_API_KEY")
-    credentials = base64.b64encode(f"{username}:{password}".encode()).decode()
-    
-    otlp_exporter = OTLPSpanExporter(
-        endpoint=os.getenv("OTLP_ENDPOINT") + "/v1/traces",
-        headers={
-            "Authorization": f"Basic {credentials}",
-            "X-Scope-OrgID": username,
-        }
+# Read and encoded once at import; setup_telemetry only ever runs once per process
+OTLP_USERNAME = os.getenv("OTLP_USERNAME", "1299868")
+OTLP_API_KEY = os.getenv("OTLP_API_KEY")
+OTLP_ENDPOINT = os.getenv("OTLP_ENDPOINT")
+# None lets the exporter fall back to the standard OTEL_EXPORTER_OTLP_* settings
+OTLP_TRACES_ENDPOINT = f"{OTLP_ENDPOINT}/v1/traces" if OTLP_ENDPOINT else None
+# Grafana Cloud Basic Auth
+OTLP_AUTH = "Basic " + base64.b64encode(
+    f"{OTLP_USERNAME}:{OTLP_API_KEY}".encode()
+).decode()
+# Shared by every exporter the pool creates; gRPC metadata keys must be lowercase
+OTLP_HEADERS = (("Authorization", OTLP_AUTH), ("X-Scope-OrgID", OTLP_USERNAME))
+OTLP_GRPC_HEADERS = tuple((key.lower(), value) for key, value in OTLP_HEADERS)
+
+# Standard OTLP protocol setting; Grafana Cloud's gateway only speaks
+# http/protobuf, gRPC is for collectors that accept it
+OTLP_PROTOCOL = os.getenv(
+    "OTEL_EXPORTER_OTLP_TRACES_PROTOCOL",
+    os.getenv("OTEL_EXPORTER_OTLP_PROTOCOL", "http/protobuf")
+)
+
+# Upper bound on exporting the verification spans; plenty for
+# TCP + TLS + one HTTP round trip, but keeps a slow network from
+# stalling the script for the exporter's 10s default
+EXPORT_TIMEOUT_MILLIS = 1500
+
+# Spans per OTLP request; keeps a large verification run well under
+# the backend's request size limit
+MAX_EXPORT_BATCH_SIZE = 128
+
+# Resource is built once per process (setup_telemetry is cached); kept as
+# plain data here so importing the module doesn't import the SDK
+RESOURCE_ATTRIBUTES = {
+    "service.name": "secure-pr-guard",
+    "service.version": "v2.0-verify",
+    "deployment.environment": "test"
+}
+
+# Exporters (each with its own connection) to round-robin over when the
+# verifier runs repeatedly in CI soak / load tests; 1 = single exporter
+EXPORTER_POOL_SIZE = int(os.getenv("VERIFY_EXPORTER_POOL_SIZE", "1"))
+
+# Batches exported in parallel; force_flush's tail is then one request's
+# latency rather than the sum of all of them
+EXPORT_WORKERS = 4
+
+# Explicit values the verification span carries. No timestamp attribute:
+# the span's own start/end times already record when it was sent
+STATIC_ATTRS = {
+    # Cost metrics - KEY ATTRIBUTES FOR VERIFICATION
+    "cost.usd": 0.123456,
+    "cost.model": "gpt-4o-mini",
+    "cost.tokens.prompt": 500,
+    "cost.tokens.completion": 150,
+    "cost.tokens.total": 650,
+    
+    # Performance metrics
+    "latency.ms": 2500,
+    "latency.api_ms": 2300,
+    
+    # Operation info
+    "operation.type": "verification",
+    "operation.name": "cost_attribute_test",
+    
+    # Test metadata
+    "test.purpose": "verify_cost_attributes_visible",
+    
+    # PR context for filtering
+    "pr.url": "https://github.com/test/verify/pull/999",
+    "pr.repository": "test/verify",
+    "pr.number": 999
+}
+
+def _http_exporter():
+    """OTLP/HTTP exporter over a gzip-compressed keep-alive session"""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from opentelemetry.exporter.otlp.proto.http import Compression
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    
+    # Keep-alive pool so repeat sends skip the TCP + TLS handshake
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    
+    return OTLPSpanExporter(
+        endpoint=OTLP_TRACES_ENDPOINT,
+        headers=dict(OTLP_HEADERS),
+        timeout=EXPORT_TIMEOUT_MILLIS / 1000,
+        compression=Compression.Gzip,
+        session=session
     )
+
+def _grpc_exporter():
+    """OTLP/gRPC exporter on one persistent HTTP/2 channel"""
+    from grpc import Compression
+    from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+    
+    # TLS is picked from the endpoint scheme
+    return OTLPSpanExporter(
+        endpoint=OTLP_ENDPOINT,
+        headers=OTLP_GRPC_HEADERS,
+        timeout=EXPORT_TIMEOUT_MILLIS / 1000,
+        compression=Compression.Gzip,
+        channel_options=(("grpc.keepalive_time_ms", 30000),)
+    )
+
+class PooledExporter:
+    """Round-robins span batches over several exporters, one connection each"""
+    
+    def __init__(self, factory, n=4):
+        self._exporters = [factory() for _ in range(n)]
+        self._counter = itertools.count()
+    
+    def export(self, spans):
+        return self._exporters[next(self._counter) % len(self._exporters)].export(spans)
+    
+    def force_flush(self, timeout_millis=30000):
+        return all(exporter.force_flush(timeout_millis) for exporter in self._exporters)
+    
+    def shutdown(self):
+        for exporter in self._exporters:
+            exporter.shutdown()
+
+class ConcurrentExporter:
+    """
+    Hands each batch to a worker thread so several exports are in flight at
+    once; the batch processor's worker only collects spans and never waits
+    on the network
+    """
+    
+    def __init__(self, exporter, max_workers=EXPORT_WORKERS):
+        from opentelemetry.sdk.trace.export import SpanExportResult
+        
+        self._exporter = exporter
+        self._success = SpanExportResult.SUCCESS
+        self._failure = SpanExportResult.FAILURE
+        self._pool = ThreadPoolExecutor(max_workers=max_workers,
+                                        thread_name_prefix="otlp-export")
+        # Bounds queued batches so a stalled backend can't buffer without limit
+        self._slots = threading.BoundedSemaphore(max_workers * 2)
+        # Every export since the last force_flush, finished or not; a flush
+        # reads their outcome and only then forgets them
+        self._pending = set()
+        self._lock = threading.Lock()
+    
+    def export(self, spans):
+        """
+        Queue a batch and return at once; the real outcome is reported by
+        the next force_flush
+        """
+        self._slots.acquire()
+        try:
+            future = self._pool.submit(self._exporter.export, spans)
+        except RuntimeError:
+            # Pool already shut down
+            self._slots.release()
+            return self._failure
+        future.add_done_callback(lambda _: self._slots.release())
+        with self._lock:
+            self._pending.add(future)
+        return self._success
+    
+    def force_flush(self, timeout_millis=30000):
+        """
+        Wait for the exports already handed off
+        
+        Returns:
+            bool: False if any export since the last flush failed or is
+            still running when the timeout expires
+        """
+        with self._lock:
+            pending = list(self._pending)
+        done, not_done = wait(pending, timeout=timeout_millis / 1000)
+        # Judged from the futures themselves: wait() can return before their
+        # done-callbacks run. The wrapped exporter logs the details
+        failed = any(
+            future.exception() is not None or future.result() is not self._success
+            for future in done
+        )
+        with self._lock:
+            self._pending -= done
+        return not not_done and not failed
     
-    span_processor = BatchSpanProcessor(otlp_exporter)
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+        self._exporter.shutdown()
+
+@lru_cache(maxsize=1)
+def setup_telemetry():
+    """
+    Setup OpenTelemetry once and reuse the (tracer, processor) pair, so
+    repeat calls don't add another processor and double-export
+    
+    Raises:
+        RuntimeError: OTLP_API_KEY is not set, so every export would be
+            rejected; fail before starting any export threads
+    """
+    if not OTLP_API_KEY:
+        raise RuntimeError("OTLP_API_KEY unset; cannot export")
+    
+    from opentelemetry import trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    
+    provider = TracerProvider(resource=Resource.create(RESOURCE_ATTRIBUTES))
+    
+    factory = _grpc_exporter if OTLP_PROTOCOL == "grpc" else _http_exporter
+    if EXPORTER_POOL_SIZE > 1:
+        otlp_exporter = PooledExporter(factory, EXPORTER_POOL_SIZE)
+    else:
+        otlp_exporter = factory()
+    
+    # Batched so the n spans of one run go out in a single request on flush.
+    # The stock processor is kept on purpose: its on_end is a lock-free
+    # deque append, so producer threads never wait on the export worker
+    span_processor = BatchSpanProcessor(
+        ConcurrentExporter(otlp_exporter),
+        max_export_batch_size=MAX_EXPORT_BATCH_SIZE,
+        export_timeout_millis=EXPORT_TIMEOUT_MILLIS
+    )
     provider.add_span_processor(span_processor)
-    trace.set_tracer_provider(provider)
     
-    return trace.get_tracer("secure-pr-guard-verify"), span_processor
+    # Don't clobber an SDK provider someone else already installed
+    if not isinstance(trace.get_tracer_provider(), TracerProvider):
+        trace.set_tracer_provider(provider)
+    
+    return provider.get_tracer("secure-pr-guard-verify"), span_processor
 
-def send_test_span_with_cost():
-    """Send a test span with cost attributes"""
+def send_test_span_with_cost(n: int = 1):
+    """
+    Send test spans with cost attributes
+    
+    Args:
+        n: Number of spans; they are exported together on the final flush
+    
+    Raises:
+        RuntimeError: OTLP_API_KEY is unset, or the spans were not delivered
+    """
     tracer, processor = setup_telemetry()
+    ts = datetime.now()
     
     print("🧪 Sending test span with cost attributes...")
     
-    with tracer.start_as_current_span("cost.verification.test") as span:
-        # Set cost attributes with explicit values
-        span.set_attributes({
-            # Cost metrics - KEY ATTRIBUTES FOR VERIFICATION
-            "cost.usd": 0.123456,
-            "cost.model": "gpt-4o-mini",
-            "cost.tokens.prompt": 500,
-            "cost.tokens.completion": 150,
-            "cost.tokens.total": 650,
-            
-            # Performance metrics
-            "latency.ms": 2500,
-            "latency.api_ms": 2300,
-            
-            # Operation info
-            "operation.type": "verification",
-            "operation.name": "cost_attribute_test",
-            
-            # Test metadata
-            "test.timestamp": datetime.now().isoformat(),
-            "test.purpose": "verify_cost_attributes_visible",
-            
-            # PR context for filtering
-            "pr.url": "https://github.com/test/verify/pull/999",
-            "pr.repository": "test/verify",
-            "pr.number": 999
-        })
-        
-        print("✅ Test span created with cost attributes")
-        
-        # Simulate some work
-        time.sleep(0.1)
+    for i in range(n):
+        name = "cost.verification.test" if n == 1 else f"cost.verification.test.{i}"
+        with tracer.start_as_current_span(name) as span:
+            # Set cost attributes with explicit values
+            span.set_attributes(STATIC_ATTRS)
+    
+    print("✅ Test span created with cost attributes")
     
     # Force flush
     print("🔭 Force flushing to Grafana Cloud...")
-    processor.force_flush(timeout_millis=10000)
+    flushed = processor.force_flush(timeout_millis=EXPORT_TIMEOUT_MILLIS)
+    # The processor only hands batches to the export threads; wait for them
+    delivered = processor.span_exporter.force_flush(timeout_millis=EXPORT_TIMEOUT_MILLIS)
+    if not (flushed and delivered):
+        raise RuntimeError("Test span export failed or timed out; see the exporter log above")
     
-    return datetime.now()
+    return ts
+
+# Printed after the span is sent, in one write rather than ~40 print() calls
+VERIFY_INSTRUCTIONS = """\
+📋 HOW TO VERIFY IN GRAFANA CLOUD:
+==================================================
+
+1️⃣ BASIC SEARCH:
+   - Go to Grafana Cloud → Explore → Tempo
+   - Query: {service.name="secure-pr-guard"}
+   - Look for spans from the last few minutes
+
+2️⃣ VERIFY COST ATTRIBUTES:
+   在TraceQL中运行以下查询:
+
+   # 查看所有cost attributes
+   {service.name="secure-pr-guard"} | select(cost.usd, cost.tokens.total)
+
+   # 查看具体的cost值
+   {service.name="secure-pr-guard" && cost.usd > 0}
+
+   # 查看verification测试span
+   {service.name="secure-pr-guard" && operation.type="verification"}
+
+3️⃣ CLICK SPAN FOR DETAILS:
+   - 点击任意span (如 nitpicker.analyze)
+   - 在右侧panel中向下滚动
+   - 查看 'Attributes' 或 'Tags' 部分
+   - 你应该看到:
+     • cost.usd: 0.123456
+     • cost.tokens.total: 650
+     • cost.tokens.prompt: 500
+     • latency.ms: 2500
+
+4️⃣ 如果还是看不到cost attributes:
+   - 确保选择了正确的时间范围
+   - 尝试刷新页面
+   - 检查span是否确实包含attributes
+
+🔍 EXPECTED RESULTS:
+   - cost.usd = 0.123456
+   - cost.tokens.total = 650
+   - latency.ms = 2500
+   - operation.type = verification
+
+💡 TROUBLESHOOTING:
+   如果attributes仍然不可见，可能是:
+   - Grafana Cloud UI需要点击具体span查看
+   - 使用TraceQL查询而不是UI浏览
+   - 等待几分钟让数据传播
+"""
 
 def main():
     """Send test data and provide verification instructions"""
+    if "--help" in sys.argv[1:]:
+        # Instructions only: no span is sent and OpenTelemetry is never imported
+        sys.stdout.write(VERIFY_INSTRUCTIONS)
+        return
+    
     print("🔍 Cost Attributes Verification Tool")
     print("=" * 50)
     
     # Send test span
-    timestamp = send_test_span_with_cost()
+    try:
+        timestamp = send_test_span_with_cost()
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
     
-    print("✅ Test span sent successfully!")
-    print(f"🕐 Timestamp: {timestamp.isoformat()}")
-    print()
-    
-    print("📋 HOW TO VERIFY IN GRAFANA CLOUD:")
-    print("=" * 50)
-    print()
-    
-    print("1️⃣ BASIC SEARCH:")
-    print("   - Go to Grafana Cloud → Explore → Tempo")
-    print("   - Query: {service.name=\"secure-pr-guard\"}")
-    print("   - Look for spans from the last few minutes")
-    print()
-    
-    print("2️⃣ VERIFY COST ATTRIBUTES:")
-    print("   在TraceQL中运行以下查询:")
-    print()
-    print("   # 查看所有cost attributes")
-    print("   {service.name=\"secure-pr-guard\"} | select(cost.usd, cost.tokens.total)")
-    print()
-    print("   # 查看具体的cost值")
-    print("   {service.name=\"secure-pr-guard\" && cost.usd > 0}")
-    print()
-    print("   # 查看verification测试span")
-    print("   {service.name=\"secure-pr-guard\" && operation.type=\"verification\"}")
-    print()
-    
-    print("3️⃣ CLICK SPAN FOR DETAILS:")
-    print("   - 点击任意span (如 nitpicker.analyze)")
-    print("   - 在右侧panel中向下滚动")
-    print("   - 查看 'Attributes' 或 'Tags' 部分")
-    print("   - 你应该看到:")
-    print("     • cost.usd: 0.123456")
-    print("     • cost.tokens.total: 650") 
-    print("     • cost.tokens.prompt: 500")
-    print("     • latency.ms: 2500")
-    print()
-    
-    print("4️⃣ 如果还是看不到cost attributes:")
-    print("   - 确保选择了正确的时间范围")
-    print("   - 尝试刷新页面")
-    print("   - 检查span是否确实包含attributes")
-    print()
-    
-    print("🔍 EXPECTED RESULTS:")
-    print("   - cost.usd = 0.123456")
-    print("   - cost.tokens.total = 650")
-    print("   - latency.ms = 2500")
-    print("   - operation.type = verification")
-    print()
-    
-    print("💡 TROUBLESHOOTING:")
-    print("   如果attributes仍然不可见，可能是:")
-    print("   - Grafana Cloud UI需要点击具体span查看")
-    print("   - 使用TraceQL查询而不是UI浏览")
-    print("   - 等待几分钟让数据传播")
+    sys.stdout.write(
+        "✅ Test span sent successfully!\n"
+        f"🕐 Timestamp: {timestamp.isoformat()}\n"
+        "\n"
+        + VERIFY_INSTRUCTIONS
+    )
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file